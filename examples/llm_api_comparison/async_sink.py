@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: async_sink.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains non-blocking sink of benchmark metrics, written by background thread.
+"""
+
+import queue
+import threading
+
+import asyncio
+
+_STOP = object()
+
+
+class AsyncMetricsSink:
+    """
+    Non-blocking sink of metrics over any writer with `write(model_name, question, metrics)` and `close()` methods
+    (MetricsCsvWriter, MetricsParquetWriter, ResultsStore).
+
+    Metrics are pushed to the bounded queue and written by background thread, so disk I/O doesn't run in the event
+    loop. When the queue is full, `put` blocks and `put_async` waits (backpressure). Closing the sink drains the queue
+    and closes the writer.
+    """
+
+    def __init__(self, writer, maxsize=1000):
+        """
+        Initialize AsyncMetricsSink class.
+
+        :param writer: The writer.
+        :type writer: MetricsCsvWriter | MetricsParquetWriter | ResultsStore
+        :param maxsize: Max count of metrics in the queue.
+        :type maxsize: int
+        """
+        self.writer = writer
+        self.written = 0
+        self.failed = 0
+        self.last_error = None
+        self.___queue = queue.Queue(maxsize)
+        self.___closed = False
+        self.___thread = threading.Thread(target=self.__write_loop, daemon=True)
+        self.___thread.start()
+
+    @property
+    def closed(self):
+        """
+        Whether the sink is closed.
+
+        :return: True if the sink is closed.
+        :rtype: bool
+        """
+        return self.___closed
+
+    @property
+    def pending(self):
+        """
+        Count of metrics waiting in the queue.
+
+        :return: The count.
+        :rtype: int
+        """
+        return self.___queue.qsize()
+
+    def __write_loop(self):
+        """Write metrics from the queue until the stop marker is received."""
+        while True:
+            item = self.___queue.get()
+            if item is _STOP:
+                return
+            try:
+                self.writer.write(*item)
+                self.written += 1
+            except Exception as error:  # pylint: disable=broad-except
+                self.failed += 1
+                self.last_error = error
+
+    def put(self, model_name, question, metrics):
+        """
+        Put metrics to the queue, blocking while the queue is full.
+
+        :param model_name: The name of the model.
+        :type model_name: str
+        :param question: The question.
+        :type question: str
+        :param metrics: The metrics.
+        :type metrics: dict
+        """
+        if self.___closed:
+            raise ValueError("Sink is closed")
+        self.___queue.put((model_name, question, metrics))
+
+    async def put_async(self, model_name, question, metrics):
+        """
+        Put metrics to the queue, waiting (without blocking the event loop) while the queue is full.
+
+        :param model_name: The name of the model.
+        :type model_name: str
+        :param question: The question.
+        :type question: str
+        :param metrics: The metrics.
+        :type metrics: dict
+        """
+        if self.___closed:
+            raise ValueError("Sink is closed")
+        try:
+            self.___queue.put_nowait((model_name, question, metrics))
+        except queue.Full:
+            await asyncio.get_running_loop().run_in_executor(None, self.___queue.put, (model_name, question, metrics))
+
+    def close(self):
+        """
+        Drain the queue and close the writer.
+
+        :raises Exception: The last error of the writer, if some metrics weren't written.
+        """
+        if self.___closed:
+            return
+        self.___closed = True
+        self.___queue.put(_STOP)
+        self.___thread.join()
+        self.writer.close()
+        if self.last_error is not None:
+            raise self.last_error
+
+    async def aclose(self):
+        """Drain the queue and close the writer without blocking the event loop."""
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def __enter__(self):
+        """
+        Enter the context.
+
+        :return: The sink.
+        :rtype: AsyncMetricsSink
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Exit the context, draining the sink.
+
+        :param exc_type: The exception type.
+        :param exc_value: The exception.
+        :param traceback: The traceback.
+        """
+        self.close()
+
+    async def __aenter__(self):
+        """
+        Enter the async context.
+
+        :return: The sink.
+        :rtype: AsyncMetricsSink
+        """
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """
+        Exit the async context, draining the sink.
+
+        :param exc_type: The exception type.
+        :param exc_value: The exception.
+        :param traceback: The traceback.
+        """
+        await self.aclose()
@@ -5,20 +5,251 @@ Author: Iliya Vereshchagin
 Copyright (c) 2023. All rights reserved.
 
 Created: 21.11.2023
-Last Modified: 21.11.2023
+Last Modified: 18.10.2026
 
 Description:
 This file contains the function for saving metrics to csv file.
 """
 
+import atexit
 import csv
 import os
+import threading
+
+FIELDNAMES = [
+    "Model",
+    "Question",
+    "Elapsed Time",
+    "Words",
+    "Chars",
+    "Tokens",
+    "Word Speed",
+    "Char Speed",
+    "Token Speed",
+    "TTFT",
+    "Chunks",
+    "Mean Chunk Gap",
+    "Median Chunk Gap",
+    "Max Chunk Gap",
+    "Tokens Per Second",
+    "Retries",
+    "Results",
+]
+
+
+def metrics_to_row(model_name, question, metrics):
+    """
+    Convert metrics to csv row.
+
+    :param model_name: The name of the model.
+    :type model_name: str
+    :param question: The question to save.
+    :type question: str
+    :param metrics: The metrics to save.
+    :type metrics: dict
+    :return: The row.
+    :rtype: dict
+    """
+    return {
+        "Model": model_name,
+        "Question": question,
+        "Elapsed Time": metrics["elapsed_time"],
+        "Words": metrics["words"],
+        "Chars": metrics["chars"],
+        "Tokens": metrics["tokens"],
+        "Word Speed": metrics["word_speed"],
+        "Char Speed": metrics["char_speed"],
+        "Token Speed": metrics["token_speed"],
+        "TTFT": metrics.get("ttft", ""),
+        "Chunks": metrics.get("chunks", ""),
+        "Mean Chunk Gap": metrics.get("mean_chunk_gap", ""),
+        "Median Chunk Gap": metrics.get("median_chunk_gap", ""),
+        "Max Chunk Gap": metrics.get("max_chunk_gap", ""),
+        "Tokens Per Second": metrics.get("tokens_per_second", ""),
+        "Retries": metrics.get("retries", ""),
+        "Results": metrics["results"],
+    }
+
+
+def read_header(file_name):
+    """
+    Read header of existing csv file.
+
+    :param file_name: The name of the file.
+    :type file_name: str
+    :return: The header, None if file doesn't exist or is empty.
+    :rtype: list[str] | None
+    """
+    try:
+        with open(file_name, newline="", encoding="utf-8") as file:
+            return next(csv.reader(file), None)
+    except FileNotFoundError:
+        return None
+
+
+def rotate_file(file_name):
+    """
+    Move file aside to the first free name like 'llms_orig.1.csv'.
+
+    :param file_name: The name of the file.
+    :type file_name: str
+    :return: The new name of the file.
+    :rtype: str
+    """
+    stem, extension = os.path.splitext(file_name)
+    index = 1
+    while os.path.exists(f"{stem}.{index}{extension}"):
+        index += 1
+    rotated_file_name = f"{stem}.{index}{extension}"
+    os.replace(file_name, rotated_file_name)
+    return rotated_file_name
+
+
+class MetricsCsvWriter:
+    """
+    Long-lived buffered writer of metrics to csv file.
+
+    File is kept open, rows are batched in memory and flushed when `batch_size` rows are collected, every
+    `flush_interval` seconds and at exit. Writer is thread-safe and may be shared by coroutines and threads.
+    Existing file with other columns (i.e. written by older version) isn't appended to, but moved aside first.
+    """
+
+    def __init__(self, file_name, batch_size=100, flush_interval=5.0, truncate=False):
+        """
+        Initialize MetricsCsvWriter class.
+
+        :param file_name: The name of the file to save to.
+        :type file_name: str
+        :param batch_size: Count of rows to flush.
+        :type batch_size: int
+        :param flush_interval: Max time rows are kept in memory, in seconds.
+        :type flush_interval: float
+        :param truncate: Start the file from scratch instead of appending (i.e. for shard outputs, which are rerun).
+        :type truncate: bool
+        """
+        self.file_name = file_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.___rows = []
+        self.___lock = threading.Lock()
+        self.___closed = threading.Event()
+        self.rotated_file_name = None
+        header = None if truncate else read_header(file_name)
+        if header is not None and header != FIELDNAMES:
+            self.rotated_file_name = rotate_file(file_name)
+            print(f"Columns of '{file_name}' differ, existing file is moved to '{self.rotated_file_name}'")
+        mode = "w" if truncate else "a"
+        self.___file = open(file_name, mode, newline="", encoding="utf-8")  # pylint: disable=consider-using-with
+        self.___writer = csv.DictWriter(self.___file, fieldnames=FIELDNAMES)
+        if self.___file.tell() == 0:
+            self.___writer.writeheader()
+        self.___flusher = threading.Thread(target=self.__flush_periodically, daemon=True)
+        self.___flusher.start()
+        atexit.register(self.close)
+
+    @property
+    def closed(self):
+        """
+        Whether the writer is closed.
+
+        :return: True if the writer is closed.
+        :rtype: bool
+        """
+        return self.___file.closed
+
+    def write(self, model_name, question, metrics):
+        """
+        Add metrics to the buffer.
+
+        :param model_name: The name of the model.
+        :type model_name: str
+        :param question: The question to save.
+        :type question: str
+        :param metrics: The metrics to save.
+        :type metrics: dict
+        """
+        row = metrics_to_row(model_name, question, metrics)
+        with self.___lock:
+            if self.___file.closed:
+                raise ValueError(f"Writer of '{self.file_name}' is closed")
+            self.___rows.append(row)
+            if len(self.___rows) >= self.batch_size:
+                self.__flush()
+
+    def __flush(self):
+        """Write buffered rows to the file. Should be called under the lock."""
+        if self.___rows:
+            self.___writer.writerows(self.___rows)
+            self.___rows = []
+        self.___file.flush()
+
+    def flush(self):
+        """Write buffered rows to the file."""
+        with self.___lock:
+            if not self.___file.closed:
+                self.__flush()
+
+    def __flush_periodically(self):
+        """Flush buffered rows every `flush_interval` seconds until the writer is closed."""
+        while not self.___closed.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Flush buffered rows and close the file."""
+        self.___closed.set()
+        with self.___lock:
+            if not self.___file.closed:
+                self.__flush()
+                self.___file.close()
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        """
+        Enter the context.
+
+        :return: The writer.
+        :rtype: MetricsCsvWriter
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Exit the context, closing the writer.
+
+        :param exc_type: The exception type.
+        :param exc_value: The exception.
+        :param traceback: The traceback.
+        """
+        self.close()
+
+
+_csv_writers = {}
+_csv_writers_lock = threading.Lock()
+
+
+def get_csv_writer(file_name):
+    """
+    Get shared writer of the file (created at first call).
+
+    :param file_name: The name of the file to save to.
+    :type file_name: str
+    :return: The writer.
+    :rtype: MetricsCsvWriter
+    """
+    with _csv_writers_lock:
+        writer = _csv_writers.get(file_name)
+        if writer is None or writer.closed:
+            writer = MetricsCsvWriter(file_name)
+            _csv_writers[file_name] = writer
+        return writer
 
 
 def save_to_csv(file_name, model_name, question, metrics):
     """
     Save metrics to csv file.
 
+    Rows are written by shared buffered writer of the file, so they reach the disk in batches (and at exit).
+
     :param file_name: The name of the file to save to.
     :type file_name: str
     :param model_name: The name of the model.
@@ -28,37 +259,4 @@ def save_to_csv(file_name, model_name, question, metrics):
     :param metrics: The metrics to save.
     :type metrics: dict
     """
-    file_exists = os.path.isfile(file_name)
-
-    with open(file_name, "a", newline="") as csvfile:
-        fieldnames = [
-            "Model",
-            "Question",
-            "Elapsed Time",
-            "Words",
-            "Chars",
-            "Tokens",
-            "Word Speed",
-            "Char Speed",
-            "Token Speed",
-            "Results",
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        if not file_exists:
-            writer.writeheader()
-
-        writer.writerow(
-            {
-                "Model": model_name,
-                "Question": question,
-                "Elapsed Time": metrics["elapsed_time"],
-                "Words": metrics["words"],
-                "Chars": metrics["chars"],
-                "Tokens": metrics["tokens"],
-                "Word Speed": metrics["word_speed"],
-                "Char Speed": metrics["char_speed"],
-                "Token Speed": metrics["token_speed"],
-                "Results": metrics["results"],
-            }
-        )
+    get_csv_writer(file_name).write(model_name, question, metrics)
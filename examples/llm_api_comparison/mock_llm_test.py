@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: mock_llm_test.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains offline benchmark of the harness itself (wrappers, csv writer, runner) against local mock server.
+"""
+
+import json
+
+import aiohttp
+import asyncio
+from llamaapi import LlamaAPI
+
+from examples.llm_api_comparison.csv_saver import save_to_csv
+from examples.llm_api_comparison.llm_questions import llm_questions
+from utils.llm_benchmark_runner import BenchmarkRunner
+from utils.llm_mock_server import LatencyProfile, MockLLMServer
+from utils.llm_timer_wrapper import TimeMetricsWrapperAsync, TimeMetricsWrapperSync
+
+HOST = "127.0.0.1"
+PORT = 8089
+profile = LatencyProfile(ttft=0.2, token_rate=100, jitter=0.0, tokens=50)
+llama = LlamaAPI("mock-token", hostname=f"http://{HOST}:{PORT}")
+
+
+@TimeMetricsWrapperAsync
+async def check_mock_openai_stream_response(prompt):
+    """
+    Check streamed chat response from mock OpenAI-compatible endpoint.
+
+    :param prompt: The prompt to use for the function.
+    :type prompt: str
+    """
+    payload = {"model": "mock", "stream": True, "messages": [{"role": "user", "content": prompt}]}
+    async with aiohttp.ClientSession() as session:
+        async with session.post(f"http://{HOST}:{PORT}/v1/chat/completions", json=payload) as response:
+            async for line in response.content:
+                data = line.decode("utf-8").strip()
+                if not data.startswith("data:") or "[DONE]" in data:
+                    continue
+                yield json.loads(data[5:])["choices"][0]["delta"]["content"]
+
+
+@TimeMetricsWrapperSync
+def check_mock_llama_response(prompt):
+    """
+    Check chat response from mock Llama endpoint.
+
+    :param prompt: The prompt to use for the function.
+    :type prompt: str
+    """
+    payload = {"messages": [{"role": "user", "content": prompt}], "stream": False}
+    return llama.run(payload).json()["choices"][0]["message"]["content"]
+
+
+async def main():
+    """Main function for benchmarking the harness overhead"""
+    filename = "llms_mock.csv"
+    expected_time = profile.ttft + (profile.tokens - 1) / profile.token_rate
+    # server runs in its own thread and event loop, so its work isn't included into measured time
+    server = MockLLMServer(profile)
+    server.start_in_thread(HOST, PORT)
+    try:
+        runner = BenchmarkRunner()
+        runner.add_provider("Mock OpenAI (stream)", check_mock_openai_stream_response, concurrency=4)
+        runner.add_provider("Mock LLAMA", check_mock_llama_response, concurrency=4)
+        results = await runner.run(
+            llm_questions, on_result=lambda model, prompt, resp: save_to_csv(filename, model, prompt, resp)
+        )
+    finally:
+        server.stop_in_thread()
+    for result in results:
+        if result["error"]:
+            print(f"{result['provider']} failed: {result['error']}")
+            continue
+        overhead = result["metrics"]["elapsed_time"] - expected_time
+        print(f"{result['provider']}: elapsed {result['metrics']['elapsed_time']:.4f}s, overhead {overhead:.4f}s")
+
+
+asyncio.run(main())
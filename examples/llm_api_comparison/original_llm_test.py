@@ -5,13 +5,15 @@ Author: Iliya Vereshchagin
 Copyright (c) 2023. All rights reserved.
 
 Created: 21.11.2023
-Last Modified: 21.11.2023
+Last Modified: 18.10.2026
 
 Description:
 This file contains benchmarks for original LLMs models.
 """
 
 import json
+import os
+from functools import partial
 
 import asyncio
 from cohere import Client as CohereClient
@@ -20,18 +22,69 @@ from openai_python_api import ChatGPT
 
 # pylint: disable=import-error
 from examples.creds import oai_token, oai_organization, cohere_token, llama_token  # type: ignore
-from examples.llm_api_comparison.csv_saver import save_to_csv
+from examples.llm_api_comparison.async_sink import AsyncMetricsSink
+from examples.llm_api_comparison.csv_saver import MetricsCsvWriter
 from examples.llm_api_comparison.llm_questions import llm_questions
+from utils.llm_benchmark_runner import BenchmarkRunner
+from utils.llm_rate_limiter import RateLimiter
+from utils.llm_response_cache import ResponseCache
+from utils.llm_single_flight import SingleFlightAsync, SingleFlightSync
 from utils.llm_timer_wrapper import TimeMetricsWrapperAsync, TimeMetricsWrapperSync
 
 # Initialize LLMs with tokens
 llama = LlamaAPI(llama_token)
 chatgpt_4 = ChatGPT(auth_token=oai_token, organization=oai_organization, stream=False)
 chatgpt_3_5_turbo = ChatGPT(auth_token=oai_token, organization=oai_organization, stream=False, model="gpt-3.5-turbo")
+chatgpt_4_stream = ChatGPT(auth_token=oai_token, organization=oai_organization, stream=True)
 cohere = CohereClient(cohere_token)
+# Responses are cached only for development runs (LLM_CACHE=1), timed runs always hit the APIs
+response_cache = ResponseCache("llm_cache.sqlite", bypass=os.environ.get("LLM_CACHE") != "1")
+# Limits are shared by all calls, waiting for the limiter isn't counted as latency, cache hits don't use limits
+rate_limiter = RateLimiter()
+rate_limiter.configure("openai", "gpt-4", rpm=500, tpm=30000)
+rate_limiter.configure("openai", "gpt-3.5-turbo", rpm=3500, tpm=90000)
+rate_limiter.configure("cohere", rpm=100)
+rate_limiter.configure("llama", rpm=60)
+# Identical prompts in flight (i.e. repeated questions) are sent once per provider and share metrics of that request,
+# so coalesced calls don't wait for the limiter either
+
+
+def track_rate_limits(chatgpt, model):
+    """
+    Adjust the limiter from 'x-ratelimit-*' headers of OpenAI responses.
+
+    ChatGPT doesn't expose responses, so the hook is added to HTTP client of its OpenAI engine. These are private
+    attributes of openai_python_api and openai, so if they are missing (other versions), the limiter just keeps
+    configured limits.
+
+    :param chatgpt: The ChatGPT instance.
+    :type chatgpt: ChatGPT
+    :param model: The name of the model.
+    :type model: str
+    """
+    engine = getattr(chatgpt, "_ChatGPT___engine", None)
+    http_client = getattr(engine, "_client", None)
+    if not hasattr(http_client, "event_hooks"):
+        print(f"Rate-limit headers of '{model}' aren't tracked: HTTP client of ChatGPT isn't found")
+        return
+
+    async def on_response(response):
+        rate_limiter.update_from_headers("openai", model, response.headers)
+
+    event_hooks = http_client.event_hooks
+    event_hooks["response"] = [*event_hooks["response"], on_response]
+    http_client.event_hooks = event_hooks
+
+
+track_rate_limits(chatgpt_4, "gpt-4")
+track_rate_limits(chatgpt_4_stream, "gpt-4")
+track_rate_limits(chatgpt_3_5_turbo, "gpt-3.5-turbo")
 
 
-@TimeMetricsWrapperAsync
+@SingleFlightAsync
+@rate_limiter.limit("openai", "gpt-4", output_tokens=500)
+@partial(TimeMetricsWrapperAsync, tokenizer_model="gpt-4")
+@response_cache.cached("openai", model="gpt-4")
 async def check_chat_gpt_4_response(prompt):
     """
     Check chat response from OpenAI API (ChatGPT-4).
@@ -42,7 +95,10 @@ async def check_chat_gpt_4_response(prompt):
     return await anext(chatgpt_4.str_chat(prompt=prompt))
 
 
-@TimeMetricsWrapperAsync
+@SingleFlightAsync
+@rate_limiter.limit("openai", "gpt-3.5-turbo", output_tokens=500)
+@partial(TimeMetricsWrapperAsync, tokenizer_model="gpt-3.5-turbo")
+@response_cache.cached("openai", model="gpt-3.5-turbo")
 async def check_chat_gpt_3_5_turbo_response(prompt):
     """
     Check chat response from OpenAI API (ChatGPT-3.5-Turbo).
@@ -53,7 +109,25 @@ async def check_chat_gpt_3_5_turbo_response(prompt):
     return await anext(chatgpt_3_5_turbo.str_chat(prompt=prompt))
 
 
+@SingleFlightAsync
+@rate_limiter.limit("openai", "gpt-4", output_tokens=500)
+@partial(TimeMetricsWrapperAsync, tokenizer_model="gpt-4")
+@response_cache.cached("openai", model="gpt-4", stream=True)
+async def check_chat_gpt_4_stream_response(prompt):
+    """
+    Check streamed chat response from OpenAI API (ChatGPT-4), measures TTFT and chunk gaps.
+
+    :param prompt: The prompt to use for the function.
+    :type prompt: str
+    """
+    async for chunk in chatgpt_4_stream.str_chat(prompt=prompt):
+        yield chunk
+
+
+@SingleFlightSync
+@rate_limiter.limit("cohere", output_tokens=100)
 @TimeMetricsWrapperSync
+@response_cache.cached("cohere", model="generate", max_tokens=100)
 def check_chat_cohere_response(prompt):
     """
     Check chat response from Cohere.
@@ -66,7 +140,10 @@ def check_chat_cohere_response(prompt):
     return texts
 
 
+@SingleFlightSync
+@rate_limiter.limit("llama", output_tokens=100)
 @TimeMetricsWrapperSync
+@response_cache.cached("llama", model="llama", max_length=100, temperature=0.1)
 def check_chat_llama_response(prompt):
     """
     Check chat response from Llama.
@@ -86,6 +163,7 @@ def check_chat_llama_response(prompt):
         "frequency_penalty": 1.0,
     }
     response = llama.run(payload)
+    rate_limiter.update_from_headers("llama", None, response.headers)
     response = json.dumps(response.json(), indent=2)
     response = json.loads(response)
     response = response["choices"][0]["message"]["content"]
@@ -100,15 +178,18 @@ def check_chat_llama_response(prompt):
 async def main():
     """Main function for benchmarking LLMs"""
     filename = "llms_orig.csv"
-    for prompt in llm_questions:
-        resp = await check_chat_gpt_4_response(prompt=prompt)
-        save_to_csv(filename, "ChatGPT-4", prompt, resp)
-        resp = await check_chat_gpt_3_5_turbo_response(prompt=prompt)
-        save_to_csv(filename, "ChatGPT-3.5-Turbo", prompt, resp)
-        resp = check_chat_cohere_response(prompt=prompt)
-        save_to_csv(filename, "Cohere", prompt, resp)
-        resp = check_chat_llama_response(prompt=prompt)
-        save_to_csv(filename, "LLAMA", prompt, resp)
+    runner = BenchmarkRunner()
+    runner.add_provider("ChatGPT-4", check_chat_gpt_4_response, concurrency=2)
+    runner.add_provider("ChatGPT-4 (stream)", check_chat_gpt_4_stream_response, concurrency=2)
+    runner.add_provider("ChatGPT-3.5-Turbo", check_chat_gpt_3_5_turbo_response, concurrency=2)
+    runner.add_provider("Cohere", check_chat_cohere_response, concurrency=2)
+    runner.add_provider("LLAMA", check_chat_llama_response, concurrency=2)
+    # Metrics are written by background thread, so disk I/O doesn't add to the wall time of the benchmark
+    async with AsyncMetricsSink(MetricsCsvWriter(filename)) as sink:
+        results = await runner.run(llm_questions, on_result=sink.put_async)
+    for result in results:
+        if result["error"]:
+            print(f"{result['provider']} failed on '{result['question']}': {result['error']}")
 
 
 asyncio.run(main())
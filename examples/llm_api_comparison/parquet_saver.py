@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: parquet_saver.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains columnar (Parquet) writer of benchmark metrics.
+"""
+
+import atexit
+import threading
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+METRICS_SCHEMA = pa.schema(
+    [
+        ("model", pa.string()),
+        ("question", pa.string()),
+        ("elapsed_time", pa.float64()),
+        ("words", pa.int64()),
+        ("chars", pa.int64()),
+        ("tokens", pa.int64()),
+        ("word_speed", pa.float64()),
+        ("char_speed", pa.float64()),
+        ("token_speed", pa.float64()),
+        ("ttft", pa.float64()),
+        ("chunks", pa.int64()),
+        ("mean_chunk_gap", pa.float64()),
+        ("median_chunk_gap", pa.float64()),
+        ("max_chunk_gap", pa.float64()),
+        ("tokens_per_second", pa.float64()),
+        ("retries", pa.int64()),
+        ("queue_time", pa.float64()),
+        ("results", pa.string()),
+    ]
+)
+LATENCY_COLUMNS = ["model", "question", "elapsed_time", "ttft", "token_speed", "tokens_per_second"]
+
+
+class MetricsParquetWriter:
+    """
+    Columnar writer of metrics to Parquet file.
+
+    Rows are batched in memory and written as row groups of `batch_size` rows. Model, question and response columns
+    are dictionary-encoded, responses are compressed with zstd, so latency columns may be read alone (column pruning)
+    without touching the response texts. Parquet files can't be appended, so every writer creates a new file; the file
+    is valid only after the writer is closed (it's done at exit too).
+    """
+
+    def __init__(self, file_name, batch_size=10000, compression="zstd"):
+        """
+        Initialize MetricsParquetWriter class.
+
+        :param file_name: The name of the file to save to.
+        :type file_name: str
+        :param batch_size: Count of rows in a row group.
+        :type batch_size: int
+        :param compression: Compression codec of the response column (other columns use snappy).
+        :type compression: str
+        """
+        self.file_name = file_name
+        self.batch_size = batch_size
+        self.___rows = []
+        self.___lock = threading.Lock()
+        compressions = {field.name: "snappy" for field in METRICS_SCHEMA}
+        compressions["results"] = compression
+        self.___writer = pq.ParquetWriter(
+            file_name,
+            METRICS_SCHEMA,
+            compression=compressions,
+            use_dictionary=["model", "question", "results"],
+            write_statistics=[field.name for field in METRICS_SCHEMA if field.name != "results"],
+        )
+        atexit.register(self.close)
+
+    @property
+    def closed(self):
+        """
+        Whether the writer is closed.
+
+        :return: True if the writer is closed.
+        :rtype: bool
+        """
+        return self.___writer is None
+
+    def write(self, model_name, question, metrics):
+        """
+        Add metrics to the buffer.
+
+        :param model_name: The name of the model.
+        :type model_name: str
+        :param question: The question to save.
+        :type question: str
+        :param metrics: The metrics to save.
+        :type metrics: dict
+        """
+        row = {field.name: metrics.get(field.name) for field in METRICS_SCHEMA}
+        row["model"] = model_name
+        row["question"] = question
+        with self.___lock:
+            if self.___writer is None:
+                raise ValueError(f"Writer of '{self.file_name}' is closed")
+            self.___rows.append(row)
+            if len(self.___rows) >= self.batch_size:
+                self.__flush()
+
+    def __flush(self):
+        """Write buffered rows as a row group. Should be called under the lock."""
+        if self.___rows:
+            self.___writer.write_table(pa.Table.from_pylist(self.___rows, schema=METRICS_SCHEMA))
+            self.___rows = []
+
+    def flush(self):
+        """Write buffered rows as a row group."""
+        with self.___lock:
+            if self.___writer is not None:
+                self.__flush()
+
+    def close(self):
+        """Flush buffered rows and close the file."""
+        with self.___lock:
+            if self.___writer is not None:
+                self.__flush()
+                self.___writer.close()
+                self.___writer = None
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        """
+        Enter the context.
+
+        :return: The writer.
+        :rtype: MetricsParquetWriter
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Exit the context, closing the writer.
+
+        :param exc_type: The exception type.
+        :param exc_value: The exception.
+        :param traceback: The traceback.
+        """
+        self.close()
+
+
+def read_metrics(file_name, columns=None):
+    """
+    Read metrics from Parquet file(s), only requested columns are loaded.
+
+    :param file_name: The name of the file (or directory with files).
+    :type file_name: str
+    :param columns: Columns to read, latency columns by default (without responses).
+    :type columns: list[str]
+    :return: The table.
+    :rtype: pyarrow.Table
+    """
+    return pq.read_table(file_name, columns=columns or LATENCY_COLUMNS)
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: prompt_corpus.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains streaming loader of prompt corpora (JSONL, CSV, Parquet) with random and stratified sampling.
+
+Every prompt is a dict with 'prompt', 'tags' (list of str) and 'expected_length' (int or None) keys. Prompts are read
+lazily, so corpora of any size are streamed with constant memory (sampling keeps only the sample).
+"""
+
+import csv
+import json
+import os
+import random
+from collections import Counter
+
+
+class PromptCorpus:
+    """
+    Streaming prompt corpus.
+
+    Corpus is re-read on every iteration, nothing but the current batch (Parquet) or line is kept in memory.
+    """
+
+    def __init__(
+        self,
+        path,
+        prompt_field="prompt",
+        tags_field="tags",
+        expected_length_field="expected_length",
+        batch_size=1024,
+    ):  # pylint: disable=too-many-arguments
+        """
+        Initialize PromptCorpus class.
+
+        :param path: Path to the corpus (.jsonl, .csv or .parquet).
+        :type path: str
+        :param prompt_field: Name of the prompt field.
+        :type prompt_field: str
+        :param tags_field: Name of the tags field (list in JSONL / Parquet, ';'-separated string in CSV).
+        :type tags_field: str
+        :param expected_length_field: Name of the field with expected length of the response.
+        :type expected_length_field: str
+        :param batch_size: Count of rows read from Parquet at once.
+        :type batch_size: int
+        :raises ValueError: If format of the corpus is not supported.
+        """
+        self.path = path
+        self.prompt_field = prompt_field
+        self.tags_field = tags_field
+        self.expected_length_field = expected_length_field
+        self.batch_size = batch_size
+        self.format = os.path.splitext(path)[1].lower().lstrip(".")
+        if self.format == "json":
+            self.format = "jsonl"
+        if self.format not in ("jsonl", "csv", "parquet"):
+            raise ValueError(f"Unsupported corpus format: '{path}'")
+
+    def __iter_records(self):
+        """
+        Read raw records of the corpus.
+
+        :return: Generator of records.
+        :rtype: Generator[dict]
+        """
+        if self.format == "jsonl":
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        yield json.loads(line)
+        elif self.format == "csv":
+            with open(self.path, newline="", encoding="utf-8") as file:
+                yield from csv.DictReader(file)
+        else:
+            import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+            parquet_file = pq.ParquetFile(self.path)
+            names = set(parquet_file.schema_arrow.names)
+            columns = [
+                name for name in (self.prompt_field, self.tags_field, self.expected_length_field) if name in names
+            ]
+            for batch in parquet_file.iter_batches(batch_size=self.batch_size, columns=columns):
+                yield from batch.to_pylist()
+
+    def __to_prompt(self, record):
+        """
+        Convert raw record to prompt dict.
+
+        :param record: The record.
+        :type record: dict
+        :return: The prompt.
+        :rtype: dict
+        """
+        tags = record.get(self.tags_field) or []
+        if isinstance(tags, str):
+            tags = [tag.strip() for tag in tags.split(";") if tag.strip()]
+        expected_length = record.get(self.expected_length_field)
+        return {
+            "prompt": record[self.prompt_field],
+            "tags": list(tags),
+            "expected_length": int(expected_length) if expected_length not in (None, "") else None,
+        }
+
+    def __iter__(self):
+        """
+        Iterate over prompts of the corpus.
+
+        :return: Generator of prompts.
+        :rtype: Generator[dict]
+        """
+        for record in self.__iter_records():
+            yield self.__to_prompt(record)
+
+    def filter(self, tags):
+        """
+        Iterate over prompts having any of the tags.
+
+        :param tags: The tags.
+        :type tags: Iterable[str]
+        :return: Generator of prompts.
+        :rtype: Generator[dict]
+        """
+        tags = set(tags)
+        return (prompt for prompt in self if tags.intersection(prompt["tags"]))
+
+    def sample(self, k, seed=None):
+        """
+        Get uniform random sample of prompts (reservoir sampling, single pass).
+
+        :param k: Size of the sample.
+        :type k: int
+        :param seed: Seed of the random generator.
+        :type seed: int
+        :return: The sample, in corpus order.
+        :rtype: list[dict]
+        """
+        return [prompt for _, prompt in sorted(reservoir_sample(enumerate(self), k, random.Random(seed)))]
+
+    @staticmethod
+    def stratum(prompt):
+        """
+        Get stratum of the prompt: its first tag or empty string for prompts without tags.
+
+        :param prompt: The prompt.
+        :type prompt: dict
+        :return: The stratum.
+        :rtype: str
+        """
+        return prompt["tags"][0] if prompt["tags"] else ""
+
+    def stratified_sample(self, k=None, per_stratum=None, seed=None):
+        """
+        Get stratified random sample of prompts, strata are defined by the first tag of the prompt.
+
+        With `per_stratum` every stratum gets the same count of prompts (single pass). With `k` the sample is split
+        across strata proportionally to their sizes (two passes: counting and sampling), every stratum gets at least
+        one prompt while possible.
+
+        :param k: Size of the sample.
+        :type k: int
+        :param per_stratum: Size of the sample of every stratum.
+        :type per_stratum: int
+        :param seed: Seed of the random generator.
+        :type seed: int
+        :return: The sample, in corpus order.
+        :rtype: list[dict]
+        :raises ValueError: If neither `k` nor `per_stratum` is set.
+        """
+        if per_stratum is not None:
+            allocation = None
+        elif k is not None:
+            allocation = allocate(Counter(self.stratum(prompt) for prompt in self), k)
+        else:
+            raise ValueError("Either 'k' or 'per_stratum' should be set")
+        rng = random.Random(seed)
+        reservoirs = {}
+        seen = Counter()
+        for index, prompt in enumerate(self):
+            stratum = self.stratum(prompt)
+            size = per_stratum if allocation is None else allocation.get(stratum, 0)
+            seen[stratum] += 1
+            reservoir = reservoirs.setdefault(stratum, [])
+            if len(reservoir) < size:
+                reservoir.append((index, prompt))
+            else:
+                position = rng.randrange(seen[stratum])
+                if position < size:
+                    reservoir[position] = (index, prompt)
+        return [prompt for _, prompt in sorted(item for reservoir in reservoirs.values() for item in reservoir)]
+
+    def texts(self, prompts=None):
+        """
+        Iterate over texts of prompts, i.e. to feed BenchmarkRunner or wrapped_llm_test.
+
+        :param prompts: The prompts (sample, filter result), all prompts of the corpus by default.
+        :type prompts: Iterable[dict]
+        :return: Generator of prompt texts.
+        :rtype: Generator[str]
+        """
+        return (prompt["prompt"] for prompt in (self if prompts is None else prompts))
+
+
+def reservoir_sample(items, k, rng=None):
+    """
+    Get uniform random sample of items in a single pass (Algorithm R).
+
+    :param items: The items.
+    :type items: Iterable
+    :param k: Size of the sample.
+    :type k: int
+    :param rng: The random generator.
+    :type rng: random.Random
+    :return: The sample (in arbitrary order).
+    :rtype: list
+    """
+    rng = rng or random.Random()
+    reservoir = []
+    for index, item in enumerate(items):
+        if index < k:
+            reservoir.append(item)
+        else:
+            position = rng.randrange(index + 1)
+            if position < k:
+                reservoir[position] = item
+    return reservoir
+
+
+def allocate(counts, k):
+    """
+    Split sample size across strata proportionally to their sizes (largest remainder method).
+
+    :param counts: Sizes of strata.
+    :type counts: dict[str, int]
+    :param k: Size of the sample.
+    :type k: int
+    :return: Sample size of every stratum.
+    :rtype: dict[str, int]
+    """
+    total = sum(counts.values())
+    if not total:
+        return {}
+    if k >= total:
+        return dict(counts)
+    if k <= len(counts):
+        return {stratum: 1 for stratum, _ in Counter(counts).most_common(k)}
+    allocation = {stratum: min(count, max(1, k * count // total)) for stratum, count in counts.items()}
+    while sum(allocation.values()) > k:
+        stratum = max((s for s in allocation if allocation[s] > 1), key=lambda s: allocation[s] - k * counts[s] / total)
+        allocation[stratum] -= 1
+    remainders = sorted(counts, key=lambda s: k * counts[s] / total - allocation[s], reverse=True)
+    while sum(allocation.values()) < k:
+        for stratum in remainders:
+            if sum(allocation.values()) < k and allocation[stratum] < counts[stratum]:
+                allocation[stratum] += 1
+    return allocation
@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: results_store.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains SQLite store of benchmark results with regression queries and CLI.
+
+Usage:
+PYTHONPATH=. python -m examples.llm_api_comparison.results_store runs
+PYTHONPATH=. python -m examples.llm_api_comparison.results_store compare <run_id> <baseline_run_id> --threshold 0.1
+PYTHONPATH=. python -m examples.llm_api_comparison.results_store trend <model> --days 7
+"""
+
+import argparse
+import atexit
+import hashlib
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from uuid import uuid4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    git_sha TEXT,
+    description TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs (run_id),
+    model TEXT NOT NULL,
+    question_hash TEXT NOT NULL,
+    question TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    elapsed_time REAL NOT NULL,
+    ttft REAL,
+    tokens INTEGER,
+    token_speed REAL,
+    retries INTEGER
+);
+CREATE INDEX IF NOT EXISTS results_model_question_run ON results (model, question_hash, run_id);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+CREATE INDEX IF NOT EXISTS results_model_created_at ON results (model, created_at);
+"""
+
+AGGREGATE_QUERY = """
+SELECT model, question_hash, MIN(question), COUNT(*), AVG(elapsed_time), SUM(tokens) / SUM(elapsed_time)
+FROM results WHERE run_id = ? GROUP BY model, question_hash
+"""
+
+
+def get_git_sha():
+    """
+    Get sha of the current git commit.
+
+    :return: The sha or None if it's not a git repository.
+    :rtype: str | None
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def question_hash(question):
+    """
+    Get hash of the question.
+
+    :param question: The question.
+    :type question: str
+    :return: SHA-1 hex digest of the question.
+    :rtype: str
+    """
+    return hashlib.sha1(question.encode("utf-8")).hexdigest()
+
+
+def is_regression(current, baseline, threshold, higher_is_worse=True):
+    """
+    Check whether the value regressed against baseline beyond the threshold.
+
+    :param current: Current value.
+    :type current: float | None
+    :param baseline: Baseline value.
+    :type baseline: float | None
+    :param threshold: Relative threshold, i.e. 0.1 is 10%.
+    :type threshold: float
+    :param higher_is_worse: Whether higher value is worse (latency) or better (throughput).
+    :type higher_is_worse: bool
+    :return: True if regressed.
+    :rtype: bool
+    """
+    if current is None or not baseline:
+        return False
+    if higher_is_worse:
+        return current > baseline * (1 + threshold)
+    return current < baseline * (1 - threshold)
+
+
+class ResultsStore:
+    """
+    SQLite store of benchmark results.
+
+    Every run has id, start time and git sha; results are indexed by (model, question, run), so comparisons of runs
+    and trends of models are answered by indexed aggregate queries. Has the same write interface as csv/parquet writers.
+    """
+
+    def __init__(self, path="llm_results.sqlite", batch_size=100):
+        """
+        Initialize ResultsStore class.
+
+        :param path: Path to SQLite file.
+        :type path: str
+        :param batch_size: Count of results to insert in one transaction.
+        :type batch_size: int
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.run_id = None
+        self.___rows = []
+        self.___lock = threading.Lock()
+        self.___connection = sqlite3.connect(path, check_same_thread=False)
+        self.___connection.executescript(SCHEMA)
+        atexit.register(self.close)
+
+    @property
+    def closed(self):
+        """
+        Whether the store is closed.
+
+        :return: True if the store is closed.
+        :rtype: bool
+        """
+        return self.___connection is None
+
+    def start_run(self, description="", git_sha=None, run_id=None):
+        """
+        Start new run, following results are written to it.
+
+        :param description: Description of the run.
+        :type description: str
+        :param git_sha: Git sha of the run, current commit by default.
+        :type git_sha: str
+        :param run_id: Id of the run, random by default.
+        :type run_id: str
+        :return: Id of the run.
+        :rtype: str
+        """
+        self.flush()
+        self.run_id = run_id or uuid4().hex
+        with self.___lock:
+            self.___connection.execute(
+                "INSERT OR IGNORE INTO runs (run_id, started_at, git_sha, description) VALUES (?, ?, ?, ?)",
+                (self.run_id, time.time(), git_sha or get_git_sha(), description),
+            )
+            self.___connection.commit()
+        return self.run_id
+
+    def write(self, model_name, question, metrics):
+        """
+        Add metrics of single call to the current run.
+
+        :param model_name: The name of the model.
+        :type model_name: str
+        :param question: The question.
+        :type question: str
+        :param metrics: The metrics.
+        :type metrics: dict
+        """
+        if self.run_id is None:
+            self.start_run()
+        row = (
+            self.run_id,
+            model_name,
+            question_hash(question),
+            question,
+            time.time(),
+            metrics["elapsed_time"],
+            metrics.get("ttft"),
+            metrics.get("tokens"),
+            metrics.get("token_speed"),
+            metrics.get("retries"),
+        )
+        with self.___lock:
+            if self.___connection is None:
+                raise ValueError(f"Store '{self.path}' is closed")
+            self.___rows.append(row)
+            if len(self.___rows) >= self.batch_size:
+                self.__flush()
+
+    def __flush(self):
+        """Insert buffered results. Should be called under the lock."""
+        if self.___rows:
+            self.___connection.executemany(
+                "INSERT INTO results (run_id, model, question_hash, question, created_at, elapsed_time, ttft, tokens, "
+                "token_speed, retries) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self.___rows,
+            )
+            self.___connection.commit()
+            self.___rows = []
+
+    def flush(self):
+        """Insert buffered results."""
+        with self.___lock:
+            if self.___connection is not None:
+                self.__flush()
+
+    def close(self):
+        """Insert buffered results and close the database."""
+        with self.___lock:
+            if self.___connection is not None:
+                self.__flush()
+                self.___connection.close()
+                self.___connection = None
+        atexit.unregister(self.close)
+
+    def __query(self, query, params=()):
+        """
+        Execute query and fetch all rows.
+
+        :param query: The query.
+        :type query: str
+        :param params: Parameters of the query.
+        :type params: tuple
+        :return: The rows.
+        :rtype: list[tuple]
+        """
+        self.flush()
+        with self.___lock:
+            return self.___connection.execute(query, params).fetchall()
+
+    def runs(self, limit=20):
+        """
+        Get latest runs.
+
+        :param limit: Max count of runs.
+        :type limit: int
+        :return: List of runs (run_id, started_at, git_sha, description, count of results).
+        :rtype: list[dict]
+        """
+        rows = self.__query(
+            "SELECT runs.run_id, started_at, git_sha, description, COUNT(results.id) FROM runs "
+            "LEFT JOIN results ON results.run_id = runs.run_id GROUP BY runs.run_id ORDER BY started_at DESC LIMIT ?",
+            (limit,),
+        )
+        keys = ("run_id", "started_at", "git_sha", "description", "results")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def compare(self, run_id, baseline_run_id, threshold=0.1):
+        """
+        Compare run against baseline per (model, question).
+
+        :param run_id: Id of the run.
+        :type run_id: str
+        :param baseline_run_id: Id of the baseline run.
+        :type baseline_run_id: str
+        :param threshold: Relative threshold of regression, i.e. 0.1 is 10%.
+        :type threshold: float
+        :return: List of comparisons with 'latency_regression' and 'throughput_regression' flags.
+        :rtype: list[dict]
+        """
+        baseline = {(row[0], row[1]): row for row in self.__query(AGGREGATE_QUERY, (baseline_run_id,))}
+        comparisons = []
+        for model, q_hash, question, count, latency, throughput in self.__query(AGGREGATE_QUERY, (run_id,)):
+            base = baseline.get((model, q_hash))
+            if base is None:
+                continue
+            comparisons.append(
+                {
+                    "model": model,
+                    "question": question,
+                    "count": count,
+                    "latency": latency,
+                    "baseline_latency": base[4],
+                    "throughput": throughput,
+                    "baseline_throughput": base[5],
+                    "latency_regression": is_regression(latency, base[4], threshold),
+                    "throughput_regression": is_regression(throughput, base[5], threshold, higher_is_worse=False),
+                }
+            )
+        return comparisons
+
+    def trend(self, model, days=7, threshold=0.1):
+        """
+        Compare model's latest period against the previous one (i.e. "did model get slower this week").
+
+        :param model: The name of the model.
+        :type model: str
+        :param days: Length of the period, in days.
+        :type days: float
+        :param threshold: Relative threshold of regression, i.e. 0.1 is 10%.
+        :type threshold: float
+        :return: Averages of both periods and regression flags.
+        :rtype: dict
+        """
+        now = time.time()
+        period = days * 24 * 3600
+        query = (
+            "SELECT COUNT(*), AVG(elapsed_time), SUM(tokens) / SUM(elapsed_time) FROM results "
+            "WHERE model = ? AND created_at >= ? AND created_at < ?"
+        )
+        current = self.__query(query, (model, now - period, now))[0]
+        previous = self.__query(query, (model, now - 2 * period, now - period))[0]
+        return {
+            "model": model,
+            "count": current[0],
+            "latency": current[1],
+            "throughput": current[2],
+            "previous_count": previous[0],
+            "previous_latency": previous[1],
+            "previous_throughput": previous[2],
+            "latency_regression": is_regression(current[1], previous[1], threshold),
+            "throughput_regression": is_regression(current[2], previous[2], threshold, higher_is_worse=False),
+        }
+
+    def __enter__(self):
+        """
+        Enter the context.
+
+        :return: The store.
+        :rtype: ResultsStore
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Exit the context, closing the store.
+
+        :param exc_type: The exception type.
+        :param exc_value: The exception.
+        :param traceback: The traceback.
+        """
+        self.close()
+
+
+def main(args_list=None):
+    """
+    Main function to query results store from command line.
+
+    :param args_list: List of command-line arguments. If None, uses sys.argv.
+    :type args_list: list[str] | None
+    :return: Exit code, 1 if regressions were found.
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description="Benchmark results store")
+    parser.add_argument("--db", default="llm_results.sqlite")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    runs_parser = subparsers.add_parser("runs", help="list latest runs")
+    runs_parser.add_argument("--limit", type=int, default=20)
+    compare_parser = subparsers.add_parser("compare", help="compare run against baseline")
+    compare_parser.add_argument("run_id")
+    compare_parser.add_argument("baseline_run_id")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+    trend_parser = subparsers.add_parser("trend", help="compare latest period of the model against previous one")
+    trend_parser.add_argument("model")
+    trend_parser.add_argument("--days", type=float, default=7)
+    trend_parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args(args_list)
+
+    with ResultsStore(args.db) as store:
+        if args.command == "runs":
+            for run in store.runs(args.limit):
+                started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["started_at"]))
+                print(f"{run['run_id']}  {started}  {run['git_sha'] or '-'}  {run['results']}  {run['description']}")
+            return 0
+        if args.command == "compare":
+            regressions = 0
+            for item in store.compare(args.run_id, args.baseline_run_id, args.threshold):
+                flags = [name for name in ("latency", "throughput") if item[f"{name}_regression"]]
+                regressions += bool(flags)
+                print(
+                    f"{'REGRESSION' if flags else 'ok':10}  {item['model']}  "
+                    f"latency {item['baseline_latency']:.3f}s -> {item['latency']:.3f}s  "
+                    f"throughput {item['baseline_throughput'] or 0:.1f} -> {item['throughput'] or 0:.1f} tok/s  "
+                    f"{item['question'][:60]}"
+                )
+            return 1 if regressions else 0
+        trend = store.trend(args.model, args.days, args.threshold)
+        print(trend)
+        return 1 if trend["latency_regression"] or trend["throughput_regression"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
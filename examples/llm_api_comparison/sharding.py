@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: sharding.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains deterministic sharding of (question x model) benchmark matrix and merging of shard outputs.
+
+Usage:
+PYTHONPATH=. python -m examples.llm_api_comparison.wrapped_llm_test --shard 1/4 --run-id nightly-42
+...
+PYTHONPATH=. python -m examples.llm_api_comparison.sharding llm_wrapped.csv
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+
+
+def parse_shard(value):
+    """
+    Parse shard from 'i/n' string, where i is 1-based index of the shard and n is count of shards.
+
+    :param value: The shard, i.e. '2/4'.
+    :type value: str
+    :return: Tuple (index, count).
+    :rtype: tuple[int, int]
+    :raises ValueError: If the shard is invalid.
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except (AttributeError, ValueError) as error:
+        raise ValueError(f"Shard should be 'i/n', got '{value}'") from error
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard index should be in 1..{count}, got '{value}'")
+    return index, count
+
+
+def shard_matrix(questions, models, index=1, count=1):
+    """
+    Get (question, model) pairs of the shard.
+
+    Pairs are dealt round-robin in (question, model) order, so shards differ in size by one pair at most and every
+    shard gets a similar mix of models. The split is deterministic for the same questions and models.
+
+    :param questions: The questions.
+    :type questions: Iterable[str]
+    :param models: The models.
+    :type models: Iterable[str]
+    :param index: 1-based index of the shard.
+    :type index: int
+    :param count: Count of shards.
+    :type count: int
+    :return: Generator of (question, model) pairs.
+    :rtype: Generator[tuple[str, str]]
+    """
+    models = list(models)
+    position = 0
+    for question in questions:
+        for model in models:
+            if position % count == index - 1:
+                yield question, model
+            position += 1
+
+
+def shard_file_name(file_name, index, count):
+    """
+    Get name of the shard output file, i.e. 'llm_wrapped.shard-1-of-4.csv'.
+
+    :param file_name: The name of merged output file.
+    :type file_name: str
+    :param index: 1-based index of the shard.
+    :type index: int
+    :param count: Count of shards.
+    :type count: int
+    :return: The name of the shard file.
+    :rtype: str
+    """
+    if count == 1:
+        return file_name
+    root, extension = os.path.splitext(file_name)
+    return f"{root}.shard-{index}-of-{count}{extension}"
+
+
+def default_run_id():
+    """
+    Get run id shared by all shards from RUN_ID environment variable.
+
+    There is no implicit fallback (i.e. git sha or date): it's the same for reruns, so outputs of different runs would
+    be merged together.
+
+    :return: The run id or None if it isn't set.
+    :rtype: str | None
+    """
+    return os.environ.get("RUN_ID") or None
+
+
+def start_shard(file_name):
+    """
+    Remove metadata of previous run of the shard, so unfinished rerun can't be merged with stale metadata.
+
+    Output of the shard itself should be truncated by the writer (MetricsCsvWriter(file_name, truncate=True)).
+
+    :param file_name: The name of the shard output file.
+    :type file_name: str
+    """
+    try:
+        os.remove(f"{file_name}.meta.json")
+    except FileNotFoundError:
+        pass
+
+
+def write_shard_metadata(file_name, run_id, index, count, items, started_at, skipped=0):
+    """
+    Write metadata of the shard next to its output ('<file>.meta.json').
+
+    :param file_name: The name of the shard output file.
+    :type file_name: str
+    :param run_id: Id of the run, shared by all shards.
+    :type run_id: str
+    :param index: 1-based index of the shard.
+    :type index: int
+    :param count: Count of shards.
+    :type count: int
+    :param items: Count of rows written by the shard.
+    :type items: int
+    :param started_at: Start time of the shard (unix time).
+    :type started_at: float
+    :param skipped: Count of (question, model) pairs skipped because of errors (i.e. open circuit).
+    :type skipped: int
+    """
+    metadata = {
+        "run_id": run_id,
+        "shard": index,
+        "shards": count,
+        "items": items,
+        "skipped": skipped,
+        "started_at": started_at,
+        "finished_at": time.time(),
+        "host": os.uname().nodename if hasattr(os, "uname") else None,
+    }
+    with open(f"{file_name}.meta.json", "w", encoding="utf-8") as file:
+        json.dump(metadata, file, indent=2)
+
+
+def merge_shards(file_name):
+    """
+    Merge csv outputs of all shards into one file with merged metadata.
+
+    :param file_name: The name of merged output file (shards are looked up by `shard_file_name` pattern).
+    :type file_name: str
+    :return: Merged metadata.
+    :rtype: dict
+    :raises ValueError: If shards are missing, belong to different runs or row count differs from metadata.
+    """
+    root, extension = os.path.splitext(file_name)
+    shards = []
+    for meta_name in glob.glob(glob.escape(root) + ".shard-*-of-*" + glob.escape(extension) + ".meta.json"):
+        with open(meta_name, encoding="utf-8") as file:
+            shards.append(json.load(file))
+    if not shards:
+        raise ValueError(f"No shards of '{file_name}' found")
+    run_ids = {shard["run_id"] for shard in shards}
+    counts = {shard["shards"] for shard in shards}
+    if len(run_ids) > 1 or len(counts) > 1:
+        raise ValueError(f"Shards belong to different runs: {sorted(run_ids)}, shard counts {sorted(counts)}")
+    count = counts.pop()
+    shards.sort(key=lambda shard: shard["shard"])
+    missing = sorted(set(range(1, count + 1)) - {shard["shard"] for shard in shards})
+    if missing:
+        raise ValueError(f"Shards {missing} of {count} are missing")
+
+    with open(file_name, "w", newline="", encoding="utf-8") as output:
+        writer = csv.writer(output)
+        header = None
+        for shard in shards:
+            with open(shard_file_name(file_name, shard["shard"], count), newline="", encoding="utf-8") as file:
+                reader = csv.reader(file)
+                shard_header = next(reader, None)
+                if header is None:
+                    header = shard_header
+                    writer.writerow(header)
+                elif shard_header != header:
+                    raise ValueError(f"Shard {shard['shard']} has different columns")
+                rows = 0
+                for row in reader:
+                    writer.writerow(row)
+                    rows += 1
+            if rows != shard["items"]:
+                raise ValueError(f"Shard {shard['shard']} has {rows} rows, but {shard['items']} items in metadata")
+
+    metadata = {
+        "run_id": run_ids.pop(),
+        "shards": count,
+        "items": sum(shard["items"] for shard in shards),
+        "skipped": sum(shard.get("skipped", 0) for shard in shards),
+        "started_at": min(shard["started_at"] for shard in shards),
+        "finished_at": max(shard["finished_at"] for shard in shards),
+        "hosts": sorted({shard["host"] for shard in shards if shard.get("host")}),
+    }
+    with open(f"{file_name}.meta.json", "w", encoding="utf-8") as file:
+        json.dump(metadata, file, indent=2)
+    return metadata
+
+
+def main(args_list=None):
+    """
+    Main function to merge shard outputs from command line.
+
+    :param args_list: List of command-line arguments. If None, uses sys.argv.
+    :type args_list: list[str] | None
+    :return: Exit code.
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description="Merge outputs of benchmark shards")
+    parser.add_argument("file_name", help="name of merged output file, i.e. llm_wrapped.csv")
+    args = parser.parse_args(args_list)
+    try:
+        metadata = merge_shards(args.file_name)
+    except ValueError as error:
+        print(error)
+        return 1
+    print(
+        f"Merged {metadata['shards']} shards ({metadata['items']} items, {metadata['skipped']} skipped) "
+        f"of run '{metadata['run_id']}'"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,26 +5,54 @@ Author: Iliya Vereshchagin
 Copyright (c) 2023. All rights reserved.
 
 Created: 21.11.2023
-Last Modified: 21.11.2023
+Last Modified: 18.10.2026
 
 Description:
 This file contains benchmarks for wrapped LLMs models.
+
+Usage:
+PYTHONPATH=. python -m examples.llm_api_comparison.wrapped_llm_test [--shard i/n] [--run-id RUN_ID]
+    [--corpus prompts.jsonl [--sample K [--stratified]]]
 """
 
+import argparse
+import os
+import time
+
 from ablt_python_api import ABLTApi
 
 # pylint: disable=import-error
 from examples.creds import ablt_token  # type: ignore
 from examples.llm_api_comparison.ablt_models import unique_models  # type: ignore
-from examples.llm_api_comparison.csv_saver import save_to_csv
+from examples.llm_api_comparison.csv_saver import MetricsCsvWriter
 from examples.llm_api_comparison.llm_questions import llm_questions
+from examples.llm_api_comparison.prompt_corpus import PromptCorpus
+from examples.llm_api_comparison.sharding import (
+    default_run_id,
+    parse_shard,
+    shard_file_name,
+    shard_matrix,
+    start_shard,
+    write_shard_metadata,
+)
+from utils.llm_rate_limiter import RateLimiter
+from utils.llm_response_cache import ResponseCache
+from utils.llm_retry_policy import CircuitOpenError, RetryPolicy
 from utils.llm_timer_wrapper import TimeMetricsWrapperSync
 
 # Initialize LLM with tokens
 ablt = ABLTApi(ablt_token)
+# Responses are cached only for development runs (LLM_CACHE=1), timed runs always hit the API
+response_cache = ResponseCache("llm_cache.sqlite", bypass=os.environ.get("LLM_CACHE") != "1")
+retry_policy = RetryPolicy(max_retries=5, base_delay=1.0, failure_threshold=5, recovery_time=60.0)
+rate_limiter = RateLimiter()
+rate_limiter.configure("ablt", rpm=60)
 
 
+@retry_policy.wrap(lambda prompt, model: f"ablt:{model}")
+@rate_limiter.limit("ablt")
 @TimeMetricsWrapperSync
+@response_cache.cached("ablt")
 def check_chat_ablt_response(prompt, model):
     """
     Check chat response from ABLT API.
@@ -39,23 +67,65 @@ def check_chat_ablt_response(prompt, model):
     return ablt.chat(bot_slug=model, prompt=prompt, max_words=None, stream=False).__next__()
 
 
-def main():
-    """Main function for benchmarking LLMs"""
-    error_counter = 5
-    for prompt in llm_questions:
-        for model in unique_models:
-            while True:
-                try:
-                    response = check_chat_ablt_response(prompt, model)
-                    save_to_csv(file_name="llm_wrapped.csv", model_name=model, question=prompt, metrics=response)
-                    error_counter = 5
-                    break
-                except Exception as error:  # pylint: disable=broad-except
-                    if error_counter == 0:
-                        print("Broken API? Skipping...")
-                        break
-                    print(f"Ooops, something went wrong: '{error}'. Retrying {5 - error_counter}/5...")
-                    error_counter -= 1
-
-
-main()
+def main(args_list=None):
+    """
+    Main function for benchmarking LLMs
+
+    :param args_list: List of command-line arguments. If None, uses sys.argv.
+    :type args_list: list[str] | None
+    """
+    parser = argparse.ArgumentParser(description="Benchmark of wrapped LLMs")
+    parser.add_argument("--shard", type=parse_shard, default=(1, 1), help="shard of the matrix to run, i.e. 2/4")
+    parser.add_argument(
+        "--run-id", default=default_run_id(), help="id of the run shared by all shards (RUN_ID), required for shards"
+    )
+    parser.add_argument("--output", default="llm_wrapped.csv", help="name of merged output file")
+    parser.add_argument(
+        "--corpus", default=None, help="prompt corpus (.jsonl, .csv or .parquet) instead of llm_questions"
+    )
+    parser.add_argument("--sample", type=int, default=None, help="size of random sample of the corpus")
+    parser.add_argument("--stratified", action="store_true", help="sample proportionally to the first tag of prompts")
+    parser.add_argument("--seed", type=int, default=0, help="seed of sampling, should be the same for all shards")
+    args = parser.parse_args(args_list)
+    index, count = args.shard
+    if count > 1 and not args.run_id:
+        parser.error("--run-id (or RUN_ID environment variable) is required for sharded runs")
+    questions = llm_questions
+    if args.corpus:
+        corpus = PromptCorpus(args.corpus)
+        if args.sample is None:
+            questions = corpus.texts()
+        elif args.stratified:
+            questions = corpus.texts(corpus.stratified_sample(k=args.sample, seed=args.seed))
+        else:
+            questions = corpus.texts(corpus.sample(args.sample, seed=args.seed))
+    file_name = shard_file_name(args.output, index, count)
+    started_at = time.time()
+    items = 0
+    skipped = []
+    if count > 1:
+        start_shard(file_name)
+    # Shard output is rewritten on every run, so rows of previous runs can't get into the merged file
+    with MetricsCsvWriter(file_name, truncate=count > 1) as writer:
+        for prompt, model in shard_matrix(questions, unique_models, index, count):
+            try:
+                response = check_chat_ablt_response(prompt, model)
+            except CircuitOpenError as error:
+                skipped.append((model, prompt, str(error)))
+                continue
+            except Exception as error:  # pylint: disable=broad-except
+                print(f"Ooops, something went wrong with '{model}': '{error}'. Skipping...")
+                skipped.append((model, prompt, str(error)))
+                continue
+            writer.write(model_name=model, question=prompt, metrics=response)
+            items += 1
+    if skipped:
+        print(f"Skipped {len(skipped)} items:")
+        for model, prompt, reason in skipped:
+            print(f"  {model}: '{prompt[:60]}' ({reason})")
+    if count > 1:
+        write_shard_metadata(file_name, args.run_id, index, count, items, started_at, skipped=len(skipped))
+
+
+if __name__ == "__main__":
+    main()
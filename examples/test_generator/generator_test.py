@@ -5,7 +5,7 @@ Author: Iliya Vereshchagin
 Copyright (c) 2023. All rights reserved.
 
 Created: 16.10.2023
-Last Modified: 17.10.2023
+Last Modified: 18.10.2026
 
 Description:
 This file contains testing procedures for ChatGPT experiments
@@ -31,7 +31,9 @@ SYSTEM_INSTRUCTIONS = """
 You're bot responsible for QA automation testing. You tech stack is selenium + pytest. I will provide you url for testing.
 
 1) You may obtain page code by calling "get_page_code" function. It will return you:
- raw HTML document, what needs to be tested (guarded by ```). And you need to respond with json in following format:
+ raw HTML document, what needs to be tested (guarded by ```). For big pages prefer "get_page_elements" function: it
+ returns only interactive and semantic elements of the page with their short XPath locators (one element per
+ line). And you need to respond with json in following format:
 {
 "page_objects": [
 "@property\\n
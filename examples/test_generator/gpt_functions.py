@@ -5,16 +5,25 @@ Author: Iliya Vereshchagin
 Copyright (c) 2023. All rights reserved.
 
 Created: 16.10.2023
-Last Modified: 16.10.2023
+Last Modified: 18.10.2026
 
 Description:
 This file contains testing procedures for ChatGPt experiments
 """
 
+import atexit
+
 from examples.test_generator.pytest_runner import run_tests
+from utils.page_cache import PageCache
 from utils.page_retriever import PageRetriever
 
-doc_engine = PageRetriever()
+# Server-rendered pages are fetched by plain HTTP, the browser is used only for pages which need JavaScript.
+# Pages are cached on disk between runs, PAGE_CACHE_OFFLINE=1 replays them from the cache without network.
+page_cache = PageCache()
+doc_engine = PageRetriever(fetch_mode="auto", cache=page_cache)
+# Browser sessions and the cache are closed at exit, so Chrome doesn't outlive the script
+atexit.register(page_cache.close)
+atexit.register(doc_engine.close)
 gpt_functions = [
     {
         "name": "get_page_code",
@@ -25,6 +34,19 @@ gpt_functions = [
             "required": [],
         },
     },
+    {
+        "name": "get_page_elements",
+        "description": "Get interactive and semantic elements of the page (inputs, buttons, links, labels, headings) "
+        "with short XPath locators and visible text, much smaller than page code",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "url": {"type": "string", "description": "The URL of the page to get the elements from"},
+                "token_budget": {"type": "integer", "description": "Max size of the result in tokens, 2000 by default"},
+            },
+            "required": [],
+        },
+    },
     {
         "name": "get_tests_results",
         "description": "Get the results of the tests",
@@ -44,5 +66,6 @@ gpt_functions = [
 
 gpt_functions_dict = {
     "get_page_code": doc_engine.get_body_without_scripts,
+    "get_page_elements": doc_engine.get_page_elements,
     "get_tests_results": run_tests,
 }
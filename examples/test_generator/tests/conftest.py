@@ -5,17 +5,21 @@ Author: Iliya Vereshchagin
 Copyright (c) 2023. All rights reserved.
 
 Created: 15.10.2023
-Last Modified: 17.10.2023
+Last Modified: 18.10.2026
 
 Description:
 This file contains pytest fixtures for tests
 """
+
+import time
+
 import pytest
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
+
+from utils.chromedriver_cache import record_launch, resolve_chromedriver
 
 
 def pytest_runtest_makereport(item, call):
@@ -42,8 +46,11 @@ def driver():
     options = Options()
     options.add_argument("--headless")
     options.headless = True
-    path = ChromeDriverManager().install()
+    start_time = time.perf_counter()
+    path = resolve_chromedriver()
+    resolved_time = time.perf_counter()
     _driver = webdriver.Chrome(service=ChromeService(executable_path=path, options=options), options=options)
+    _driver.startup_timings = record_launch(resolved_time - start_time, time.perf_counter() - resolved_time)
 
     yield _driver
 
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: chromedriver_cache.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains cached resolution of chromedriver binary (once per process and in persisted cache file).
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+from webdriver_manager.chrome import ChromeDriverManager
+
+CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "ai_engines", "chromedriver.json")
+CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+
+_resolved = {}
+_lock = threading.Lock()
+startup_timings = {"resolve": None, "resolve_source": None, "launches": []}
+
+
+def get_chrome_version():
+    """
+    Get version of installed Chrome (CHROME_VERSION environment variable overrides it).
+
+    :return: (str) The version, i.e. '129.0.6668.58', or None if Chrome isn't found.
+    """
+    version = os.environ.get("CHROME_VERSION")
+    if version:
+        return version
+    for binary in CHROME_BINARIES:
+        path = shutil.which(binary)
+        if not path:
+            continue
+        try:
+            output = subprocess.check_output([path, "--version"], stderr=subprocess.DEVNULL, text=True, timeout=10)
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r"\d+(\.\d+)+", output)
+        if match:
+            return match.group(0)
+    return None
+
+
+def read_cache(cache_file, chrome_version):
+    """
+    Read driver path from the cache file, if it's still valid.
+
+    :param cache_file: (str) Path to the cache file.
+    :param chrome_version: (str) Version of installed Chrome.
+    :return: (str) Path to chromedriver or None if cache is missing or stale.
+    """
+    try:
+        with open(cache_file, encoding="utf-8") as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        return None
+    path = cache.get("path")
+    if not path or not os.access(path, os.X_OK):
+        return None
+    if chrome_version and cache.get("chrome_major") != chrome_version.split(".")[0]:
+        return None
+    return path
+
+
+def write_cache(cache_file, path, chrome_version):
+    """
+    Persist resolved driver path.
+
+    :param cache_file: (str) Path to the cache file.
+    :param path: (str) Path to chromedriver.
+    :param chrome_version: (str) Version of installed Chrome.
+    """
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "path": path,
+                    "chrome_version": chrome_version,
+                    "chrome_major": chrome_version.split(".")[0] if chrome_version else None,
+                    "resolved_at": time.time(),
+                },
+                file,
+            )
+        os.replace(temp_file, cache_file)
+    except OSError:
+        pass
+
+
+def resolve_chromedriver(cache_file=CACHE_FILE):
+    """
+    Get path to chromedriver binary.
+
+    The path is resolved once per process. Between processes it's kept in the cache file, which is valid while the
+    binary exists and major version of installed Chrome is the same. Only when both miss ChromeDriverManager is used.
+    Time of the resolution and its source ('memory', 'file' or 'manager') are kept in `startup_timings`.
+
+    :param cache_file: (str) Path to the cache file (CHROMEDRIVER_CACHE environment variable overrides it).
+    :return: (str) Path to chromedriver.
+    """
+    cache_file = os.environ.get("CHROMEDRIVER_CACHE", cache_file)
+    start_time = time.perf_counter()
+    with _lock:
+        path = _resolved.get(cache_file)
+        source = "memory"
+        if path is None:
+            chrome_version = get_chrome_version()
+            path = read_cache(cache_file, chrome_version)
+            source = "file"
+            if path is None:
+                path = ChromeDriverManager().install()
+                source = "manager"
+                write_cache(cache_file, path, chrome_version)
+            _resolved[cache_file] = path
+        startup_timings["resolve"] = time.perf_counter() - start_time
+        startup_timings["resolve_source"] = source
+    return path
+
+
+def record_launch(resolve_time, launch_time):
+    """
+    Record timings of browser startup.
+
+    :param resolve_time: (float) Time of driver resolution, in seconds.
+    :param launch_time: (float) Time of browser launch, in seconds.
+    :return: (dict) The timings.
+    """
+    timings = {
+        "resolve": resolve_time,
+        "resolve_source": startup_timings["resolve_source"],
+        "launch": launch_time,
+        "total": resolve_time + launch_time,
+    }
+    with _lock:
+        startup_timings["launches"].append(timings)
+    return timings
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: dom_chunker.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains splitting of (cleaned) page body into token-bounded chunks along element boundaries.
+"""
+
+import re
+from html import escape
+
+from lxml import html as lxml_html
+
+from .llm_tokenizers import count_tokens
+
+CONTEXT_ATTRIBUTES = ("id", "class", "name", "role", "aria-label", "data-testid", "data-test", "data-qa")
+VOID_TAGS = frozenset(
+    ("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr")
+)
+MAX_ENTITY_LENGTH = 10
+WORD_PATTERN = re.compile(r"\s*\S+\s*|\s+")
+
+
+def open_tag(element):
+    """
+    Get opening tag of the element with attributes identifying it (id, class, name, role, etc.).
+
+    :param element: (lxml.html.HtmlElement) The element.
+    :return: (str) The opening tag.
+    """
+    attributes = "".join(
+        f' {name}="{escape(element.attrib[name])}"' for name in CONTEXT_ATTRIBUTES if element.attrib.get(name)
+    )
+    return f"<{element.tag}{attributes}>"
+
+
+def describe_path(path):
+    """
+    Describe parent path in CSS-like form, i.e. 'body > div#main > form.login'.
+
+    :param path: (tuple) Ancestors of the chunk.
+    :return: (str) The description.
+    """
+    steps = []
+    for element in path:
+        step = element.tag
+        if element.get("id"):
+            step += f"#{element.get('id')}"
+        elif element.get("class"):
+            step += "." + ".".join(element.get("class").split())
+        steps.append(step)
+    return " > ".join(steps)
+
+
+def split_text(text, max_tokens, model=None):
+    """
+    Split text into pieces of at most `max_tokens` tokens by words (halving the text until pieces fit). Words longer
+    than the budget are split by characters (not inside of HTML entities).
+
+    :param text: (str) The text.
+    :param max_tokens: (int) Max count of tokens of the piece.
+    :param model: (str) Model, which tokenizer is used to count tokens.
+    :return: (Generator[str]) The pieces.
+    """
+    if len(text) <= 1 or count_tokens(text, model) <= max_tokens:
+        yield text
+        return
+    # words keep their trailing whitespace, so joined pieces give the original text
+    words = WORD_PATTERN.findall(text)
+    if len(words) > 1:
+        middle = len(words) // 2
+        yield from split_text("".join(words[:middle]), max_tokens, model)
+        yield from split_text("".join(words[middle:]), max_tokens, model)
+        return
+    middle = len(text) // 2
+    entity_start = text.rfind("&", max(0, middle - MAX_ENTITY_LENGTH), middle)
+    if entity_start > 0 and ";" not in text[entity_start:middle]:
+        middle = entity_start
+    yield from split_text(text[:middle], max_tokens, model)
+    yield from split_text(text[middle:], max_tokens, model)
+
+
+class DomChunker:
+    """
+    The DomChunker class splits page body into chunks of at most `max_tokens` tokens.
+
+    Elements which fit into the budget are never split; bigger ones are descended into. Every chunk is wrapped into
+    opening and closing tags of its ancestors (parent path), so it can be understood without the rest of the page.
+    """
+
+    def __init__(self, max_tokens=3000, model=None):
+        """
+        General init.
+
+        :param max_tokens: (int) Max count of tokens of the chunk.
+        :param model: (str) Model, which tokenizer is used to count tokens.
+        """
+        self.max_tokens = max_tokens
+        self.model = model
+
+    def __tokens(self, text):
+        """
+        Count tokens of the text.
+
+        :param text: (str) The text.
+        :return: (int) Count of tokens.
+        """
+        return count_tokens(text, self.model)
+
+    @staticmethod
+    def __wrap(path, content):
+        """
+        Wrap content into opening and closing tags of its ancestors.
+
+        :param path: (tuple) Ancestors of the content.
+        :param content: (str) HTML of the content.
+        :return: (str) Wrapped HTML.
+        """
+        opening = "".join(open_tag(element) for element in path)
+        closing = "".join(f"</{element.tag}>" for element in reversed(path))
+        return opening + content + closing
+
+    def __units(self, element, path):
+        """
+        Split the element into units fitting into the budget together with their parent path.
+
+        :param element: (lxml.html.HtmlElement) The element.
+        :param path: (tuple) Ancestors of the element.
+        :return: (Generator[tuple]) Units (path, html).
+        """
+        content = lxml_html.tostring(element, encoding="unicode", with_tail=False)
+        if self.__tokens(self.__wrap(path, content)) <= self.max_tokens:
+            yield path, content
+        else:
+            inner_path = path + (element,)
+            empty = True
+            if element.text and element.text.strip():
+                for piece in self.__pieces(element.text, inner_path):
+                    empty = False
+                    yield inner_path, piece
+            for child in element:
+                if isinstance(child.tag, str):
+                    for unit in self.__units(child, inner_path):
+                        empty = False
+                        yield unit
+                if child.tail and child.tail.strip():
+                    for piece in self.__pieces(child.tail, inner_path):
+                        empty = False
+                        yield inner_path, piece
+            if empty:
+                # element is big only because of its attributes (i.e. inlined image), it's kept as identifying tag
+                yield self.__stub(element, path)
+
+    def __pieces(self, text, path):
+        """
+        Split the text into pieces fitting into the budget together with their parent path.
+
+        :param text: (str) The text.
+        :param path: (tuple) Ancestors of the text.
+        :return: (Generator[str]) Escaped pieces of the text.
+        """
+        budget = max(self.max_tokens - self.__tokens(self.__wrap(path, "")), 1)
+        for piece in split_text(escape(text, quote=False), budget, self.model):
+            if budget > 1 and self.__tokens(self.__wrap(path, piece)) > self.max_tokens:
+                # tokens at the borders of the piece and tags may merge differently than counted separately
+                yield from split_text(piece, budget - 1, self.model)
+            else:
+                yield piece
+
+    def __stub(self, element, path):
+        """
+        Get unit of the element without content and not identifying attributes.
+
+        :param element: (lxml.html.HtmlElement) The element.
+        :param path: (tuple) Ancestors of the element.
+        :return: (tuple) Unit (path, html).
+        """
+        closing = "" if element.tag in VOID_TAGS else f"</{element.tag}>"
+        content = open_tag(element) + closing
+        if self.__tokens(self.__wrap(path, content)) > self.max_tokens:
+            content = f"<{element.tag}>{closing}"
+        return path, content
+
+    def __chunk(self, path, parts, index):
+        """
+        Build chunk from units sharing the parent path.
+
+        :param path: (tuple) Ancestors of the units.
+        :param parts: (list) HTML of the units.
+        :param index: (int) Index of the chunk.
+        :return: (dict) Chunk with 'index', 'path', 'content' and 'tokens'.
+        """
+        content = self.__wrap(path, "".join(parts))
+        return {"index": index, "path": describe_path(path), "content": content, "tokens": self.__tokens(content)}
+
+    def iter_chunks(self, html_content):
+        """
+        Split the page into chunks.
+
+        Consecutive units with the same parent path are packed into one chunk while it fits into the budget.
+
+        :param html_content: (str) HTML content of the page (or its cleaned body).
+        :return: (Generator[dict]) Chunks with 'index', 'path' (i.e. 'body > div#main'), 'content' and 'tokens'.
+        """
+        if not html_content or not html_content.strip():
+            return
+        body = lxml_html.document_fromstring(html_content).find("body")
+        if body is None:
+            return
+        index = 0
+        current_path, parts, chunk = None, [], None
+        for path, content in self.__units(body, ()):
+            # tokens of the whole chunk are counted, sum of tokens of its parts may be lower (i.e. for heuristic)
+            candidate = self.__chunk(path, parts + [content], index) if path == current_path else None
+            if candidate is None or candidate["tokens"] > self.max_tokens:
+                if chunk is not None:
+                    yield chunk
+                    index += 1
+                current_path, parts = path, []
+                candidate = self.__chunk(path, [content], index)
+            parts.append(content)
+            chunk = candidate
+        if chunk is not None:
+            yield chunk
+
+
+def iter_dom_chunks(html_content, max_tokens=3000, model=None):
+    """
+    Split the page into token-bounded chunks along element boundaries, with parent path kept in every chunk.
+
+    :param html_content: (str) HTML content of the page (or its cleaned body).
+    :param max_tokens: (int) Max count of tokens of the chunk.
+    :param model: (str) Model, which tokenizer is used to count tokens.
+    :return: (Generator[dict]) Chunks with 'index', 'path', 'content' and 'tokens'.
+    """
+    return DomChunker(max_tokens, model).iter_chunks(html_content)
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: dom_distiller.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains token-budgeted distillation of web page to its interactive and semantic elements with short XPaths.
+"""
+
+import re
+from collections import Counter
+from html import escape
+
+from lxml import html as lxml_html
+
+from .html_cleaner import REMOVED_TAGS, is_hidden
+from .llm_tokenizers import count_tokens
+
+# Lower priority elements are dropped first when the budget is exceeded
+PRIORITIES = {
+    "input": 0,
+    "button": 0,
+    "select": 0,
+    "textarea": 0,
+    "form": 0,
+    "a": 1,
+    "label": 1,
+    "h1": 1,
+    "h2": 1,
+    "h3": 1,
+    "h4": 2,
+    "h5": 2,
+    "h6": 2,
+    "option": 2,
+    "img": 2,
+    "nav": 2,
+    "header": 2,
+    "footer": 2,
+    "main": 2,
+    "dialog": 2,
+}
+INTERACTIVE_ROLES = frozenset(("button", "link", "checkbox", "radio", "tab", "menuitem", "switch", "textbox", "option"))
+KEPT_ATTRIBUTES = (
+    "id",
+    "name",
+    "type",
+    "placeholder",
+    "aria-label",
+    "role",
+    "href",
+    "for",
+    "value",
+    "alt",
+    "title",
+    "data-testid",
+    "data-test",
+    "data-qa",
+)
+TEXT_LOCATED_TAGS = frozenset(("a", "button", "label", "h1", "h2", "h3", "h4", "h5", "h6"))
+TEST_ATTRIBUTES = ("data-testid", "data-test", "data-qa")
+# Generated ids (i.e. 'ember123', ':r1:', 'a3f9c2e1b7') aren't stable between page loads
+GENERATED_ID_PATTERN = re.compile(r"\d{3,}|^:|[0-9a-f]{8,}|^(ember|react|mui|radix)", re.IGNORECASE)
+MAX_TEXT_LENGTH = 80
+MAX_ATTRIBUTE_LENGTH = 100
+
+
+def quote_attribute(value):
+    """
+    Escape value of double-quoted attribute (single quotes of XPath literals are kept as is).
+
+    :param value: (str) The value.
+    :return: (str) Escaped value.
+    """
+    return escape(value, quote=False).replace('"', "&quot;")
+
+
+def visible_text(element):
+    """
+    Get visible text of the element (without removed and hidden descendants), normalized and truncated.
+
+    :param element: (lxml.html.HtmlElement) The element.
+    :return: (str) The text.
+    """
+    parts = []
+    stack = [element]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            parts.append(node)
+            continue
+        if not isinstance(node.tag, str) or node.tag in REMOVED_TAGS or is_hidden(node.attrib):
+            if node is not element and node.tail:
+                parts.append(node.tail)
+            continue
+        if node is not element and node.tail:
+            stack.append(node.tail)
+        stack.extend(reversed(list(node)))
+        if node.text:
+            stack.append(node.text)
+    text = " ".join("".join(parts).split())
+    return text if len(text) <= MAX_TEXT_LENGTH else text[: MAX_TEXT_LENGTH - 1] + "…"
+
+
+def xpath_literal(value):
+    """
+    Quote value for XPath expression.
+
+    :param value: (str) The value.
+    :return: (str) Quoted value.
+    """
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    parts = value.split("'")
+    return "concat(" + ', "\'", '.join(f"'{part}'" for part in parts) + ")"
+
+
+def is_stable_id(value):
+    """
+    Check whether id looks hand-written (not generated by framework).
+
+    :param value: (str) The id.
+    :return: (bool) True if id looks stable.
+    """
+    return bool(value) and not GENERATED_ID_PATTERN.search(value)
+
+
+class DomDistiller:
+    """
+    The DomDistiller class distills page to interactive (inputs, buttons, links, labels) and semantic (headings,
+    landmarks) elements with visible text and short, unique XPaths, fitting into the token budget.
+    """
+
+    def __init__(self, html_content):
+        """
+        General init.
+
+        :param html_content: (str) HTML content of the page.
+        """
+        self.html_content = html_content
+        document = lxml_html.document_fromstring(html_content) if html_content and html_content.strip() else None
+        self.body = document.find("body") if document is not None else None
+        self.elements = []
+        self.___counts = Counter()
+        if self.body is not None:
+            self.__collect()
+
+    def __collect(self):
+        """Collect kept elements in document order and count attribute values (for uniqueness of XPaths)."""
+        stack = [(self.body, None)]
+        while stack:
+            element, anchor = stack.pop()
+            tag = element.tag
+            if not isinstance(tag, str) or tag in REMOVED_TAGS or is_hidden(element.attrib):
+                continue
+            attributes = element.attrib
+            for name in ("id", "name", "aria-label", "placeholder") + TEST_ATTRIBUTES:
+                if attributes.get(name):
+                    self.___counts[(name, attributes[name])] += 1
+                    self.___counts[(tag, name, attributes[name])] += 1
+            if attributes.get("role") in INTERACTIVE_ROLES or tag in PRIORITIES or "onclick" in attributes:
+                if tag != "img" or attributes.get("alt"):
+                    self.elements.append((element, anchor))
+            if is_stable_id(attributes.get("id")):
+                anchor = element
+            stack.extend((child, anchor) for child in reversed(list(element)))
+        for element, _ in self.elements:
+            if element.tag in TEXT_LOCATED_TAGS or element.attrib.get("role") in INTERACTIVE_ROLES:
+                self.___counts[("text", element.tag, visible_text(element))] += 1
+
+    def __unique(self, *key):
+        """
+        Check whether attribute value is unique on the page.
+
+        :param key: (tuple) Counter key.
+        :return: (bool) True if value is unique.
+        """
+        return self.___counts[key] == 1
+
+    def xpath(self, element, anchor=None):
+        """
+        Get short XPath of the element: by test attribute, stable id, name, aria-label, placeholder or text, falling
+        back to path relative to the nearest ancestor with stable id (or to body).
+
+        :param element: (lxml.html.HtmlElement) The element.
+        :param anchor: (lxml.html.HtmlElement) Nearest ancestor with stable id.
+        :return: (str) The XPath.
+        """
+        tag = element.tag
+        attributes = element.attrib
+        for name in TEST_ATTRIBUTES:
+            value = attributes.get(name)
+            if value and self.__unique(name, value):
+                return f"//*[@{name}={xpath_literal(value)}]"
+        value = attributes.get("id")
+        if is_stable_id(value) and self.__unique("id", value):
+            return f"//{tag}[@id={xpath_literal(value)}]"
+        for name in ("name", "aria-label", "placeholder"):
+            value = attributes.get(name)
+            if value and self.__unique(tag, name, value):
+                return f"//{tag}[@{name}={xpath_literal(value)}]"
+        text = visible_text(element)
+        if text and not text.endswith("…") and self.__unique("text", tag, text):
+            return f"//{tag}[normalize-space()={xpath_literal(text)}]"
+        root = anchor if anchor is not None else self.body
+        steps = []
+        node = element
+        while node is not root and node is not None:
+            parent = node.getparent()
+            siblings = [sibling for sibling in parent if sibling.tag == node.tag] if parent is not None else [node]
+            steps.append(node.tag if len(siblings) == 1 else f"{node.tag}[{siblings.index(node) + 1}]")
+            node = parent
+        prefix = f"//*[@id={xpath_literal(root.get('id'))}]" if root is not self.body else "/html/body"
+        return prefix + "/" + "/".join(reversed(steps))
+
+    def describe(self, element, anchor=None):
+        """
+        Describe the element as compact HTML-like line with its XPath and visible text.
+
+        :param element: (lxml.html.HtmlElement) The element.
+        :param anchor: (lxml.html.HtmlElement) Nearest ancestor with stable id.
+        :return: (str) The line.
+        """
+        attributes = "".join(
+            f' {name}="{quote_attribute(element.attrib[name][:MAX_ATTRIBUTE_LENGTH])}"'
+            for name in KEPT_ATTRIBUTES
+            if element.attrib.get(name)
+        )
+        text = "" if element.tag in ("form", "nav", "header", "footer", "main", "select") else visible_text(element)
+        xpath = quote_attribute(self.xpath(element, anchor))
+        return f'<{element.tag}{attributes} xpath="{xpath}">{escape(text, quote=False)}'
+
+    def distill(self, token_budget=2000, model=None):
+        """
+        Distill the page into the token budget.
+
+        Elements are kept in document order; when the budget is exceeded, less important elements (headings of low
+        levels, images, landmarks, then links, labels and headings) are dropped first.
+
+        :param token_budget: (int) Max count of tokens of the result.
+        :param model: (str) Model, which tokenizer is used to count tokens.
+        :return: (dict) 'content', 'tokens', 'original_tokens', 'compression_ratio', 'elements' and 'dropped'.
+        """
+        lines = []
+        for position, (element, anchor) in enumerate(self.elements):
+            line = self.describe(element, anchor)
+            priority = PRIORITIES.get(element.tag, 0)
+            lines.append((priority, position, line, count_tokens(line + "\n", model)))
+        kept = []
+        used = 0
+        for priority, position, line, tokens in sorted(lines):
+            if used + tokens <= token_budget:
+                kept.append((position, line))
+                used += tokens
+        content = "\n".join(line for _, line in sorted(kept))
+        tokens = count_tokens(content, model)
+        # sum of tokens of separate lines may be lower than tokens of joined output (i.e. for heuristic), so the least
+        # important lines are dropped until the output itself fits
+        while kept and tokens > token_budget:
+            kept.pop()
+            content = "\n".join(line for _, line in sorted(kept))
+            tokens = count_tokens(content, model)
+        original_tokens = count_tokens(self.html_content or "", model)
+        return {
+            "content": content,
+            "tokens": tokens,
+            "original_tokens": original_tokens,
+            "compression_ratio": original_tokens / tokens if tokens else float("inf"),
+            "elements": len(kept),
+            "dropped": len(lines) - len(kept),
+        }
+
+
+def distill_html(html_content, token_budget=2000, model=None):
+    """
+    Distill the page to interactive and semantic elements with short XPaths, fitting into the token budget.
+
+    :param html_content: (str) HTML content of the page.
+    :param token_budget: (int) Max count of tokens of the result.
+    :param model: (str) Model, which tokenizer is used to count tokens.
+    :return: (dict) 'content', 'tokens', 'original_tokens', 'compression_ratio', 'elements' and 'dropped'.
+    """
+    return DomDistiller(html_content).distill(token_budget, model)
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: html_cleaner.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains single-pass lxml cleaner of page body (scripts, styles, svg, comments and hidden nodes are stripped)
+and its streaming variant for huge documents.
+
+Usage (benchmark against PageRetriever.extract_body_content + remove_script_tags):
+PYTHONPATH=. python -m utils.html_cleaner [page.html]
+"""
+
+import re
+import sys
+import time
+from functools import partial
+from html import escape
+from io import StringIO
+
+from lxml import etree
+from lxml import html as lxml_html
+
+REMOVED_TAGS = frozenset(("script", "style", "svg", "path", "noscript", "template", "link", "meta"))
+VOID_TAGS = frozenset(
+    ("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr")
+)
+HIDDEN_STYLE_PATTERN = re.compile(r"(display\s*:\s*none|visibility\s*:\s*hidden)", re.IGNORECASE)
+
+
+def is_hidden(attributes):
+    """
+    Check whether the element is hidden by its attributes ('hidden' or inline 'display: none' / 'visibility: hidden').
+
+    :param attributes: (Mapping) Attributes of the element.
+    :return: (bool) True if the element is hidden.
+    """
+    if "hidden" in attributes:
+        return True
+    style = attributes.get("style")
+    return bool(style and HIDDEN_STYLE_PATTERN.search(style))
+
+
+def clean_html(html_content):
+    """
+    Get body of the page without scripts, styles, svg, comments and hidden nodes, in a single traversal.
+
+    :param html_content: (str) HTML content of the page.
+    :return: (str) Cleaned body of the page.
+    """
+    if not html_content or not html_content.strip():
+        return "<body></body>"
+    document = lxml_html.document_fromstring(html_content)
+    body = document.find("body")
+    if body is None:
+        return "<body></body>"
+    removed = []
+    stack = list(body)
+    while stack:
+        element = stack.pop()
+        tag = element.tag
+        if not isinstance(tag, str):
+            # comments and processing instructions
+            removed.append(element)
+        elif tag.rpartition("}")[2].lower() in REMOVED_TAGS or is_hidden(element.attrib):
+            removed.append(element)
+        else:
+            stack.extend(element)
+    for element in removed:
+        element.drop_tree()
+    return lxml_html.tostring(body, encoding="unicode")
+
+
+class _CleaningTarget:
+    """Parser target writing cleaned body as the document is parsed."""
+
+    def __init__(self):
+        """General init."""
+        self.output = []
+        self.___in_body = False
+        self.___skip_depth = 0
+
+    def start(self, tag, attrib):
+        """
+        Handle start tag.
+
+        :param tag: (str) The tag.
+        :param attrib: (dict) The attributes.
+        """
+        if self.___skip_depth:
+            self.___skip_depth += 1
+            return
+        if tag == "body":
+            self.___in_body = True
+        if not self.___in_body:
+            return
+        if tag in REMOVED_TAGS or is_hidden(attrib):
+            if tag not in VOID_TAGS:
+                self.___skip_depth = 1
+            return
+        attributes = "".join(f' {name}="{escape(value)}"' for name, value in attrib.items())
+        self.output.append(f"<{tag}{attributes}>")
+
+    def end(self, tag):
+        """
+        Handle end tag.
+
+        :param tag: (str) The tag.
+        """
+        if self.___skip_depth:
+            self.___skip_depth -= 1
+            return
+        if self.___in_body and tag not in VOID_TAGS:
+            self.output.append(f"</{tag}>")
+        if tag == "body":
+            self.___in_body = False
+
+    def data(self, data):
+        """
+        Handle text.
+
+        :param data: (str) The text.
+        """
+        if self.___in_body and not self.___skip_depth:
+            self.output.append(escape(data, quote=False))
+
+    def comment(self, text):
+        """
+        Handle comment (dropped).
+
+        :param text: (str) The comment.
+        """
+
+    def close(self):
+        """
+        Finish parsing.
+
+        :return: (None) Nothing, output is collected in `output`.
+        """
+
+
+def iter_clean_html(chunks):
+    """
+    Streaming variant of `clean_html`: parse the page chunk by chunk and yield cleaned body as it's produced.
+
+    The tree isn't built, so memory doesn't grow with the size of the document.
+
+    :param chunks: (Iterable[str]) Chunks of HTML content (i.e. lines of the file or chunks of HTTP response).
+    :return: (Generator[str]) Chunks of cleaned body.
+    """
+    target = _CleaningTarget()
+    parser = etree.HTMLParser(target=target, remove_comments=True)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if target.output:
+            yield "".join(target.output)
+            target.output.clear()
+    parser.close()
+    if target.output:
+        yield "".join(target.output)
+
+
+def benchmark(html_content, repeat=5):
+    """
+    Compare cleaners with the current PageRetriever functions on the page.
+
+    :param html_content: (str) HTML content of the page.
+    :param repeat: (int) Count of runs of every cleaner, the best time is reported.
+    :return: (dict) Best time in seconds and output size in chars for every cleaner.
+    """
+    from utils.page_retriever import PageRetriever  # pylint: disable=import-outside-toplevel
+
+    cleaners = {
+        "regex + html.parser": lambda: PageRetriever.remove_script_tags(
+            PageRetriever.extract_body_content(html_content)
+        ),
+        "lxml single pass": lambda: clean_html(html_content),
+        "lxml streaming": lambda: "".join(iter_clean_html(iter(partial(StringIO(html_content).read, 65536), ""))),
+    }
+    results = {}
+    for name, cleaner in cleaners.items():
+        best = float("inf")
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            output = cleaner()
+            best = min(best, time.perf_counter() - start_time)
+        results[name] = {"time": best, "chars": len(output)}
+    return results
+
+
+def sample_page(blocks=2000):
+    """
+    Generate synthetic page with scripts, styles, svg icons, comments and hidden nodes.
+
+    :param blocks: (int) Count of content blocks.
+    :return: (str) HTML of the page.
+    """
+    block = (
+        '<div class="card"><!-- card --><h2>Title {0}</h2><p>Some <b>text</b> of block {0}.</p>'
+        '<svg viewBox="0 0 24 24"><path d="M12 2L2 7l10 5 10-5-10-5z"></path></svg>'
+        '<button id="btn-{0}" type="button">Buy</button><span hidden>secret</span>'
+        '<script>window.dataLayer.push({{"block": {0}}});</script><style>.card{{color:red}}</style></div>'
+    )
+    content = "".join(block.format(i) for i in range(blocks))
+    return f"<html><head><title>Sample</title></head><body>{content}</body></html>"
+
+
+def main(args_list=None):
+    """
+    Run benchmark of cleaners on the page file (or synthetic page).
+
+    :param args_list: (list) Command-line arguments, uses sys.argv if None.
+    """
+    args_list = sys.argv[1:] if args_list is None else args_list
+    if args_list:
+        with open(args_list[0], encoding="utf-8") as file:
+            html_content = file.read()
+    else:
+        html_content = sample_page()
+    print(f"Page: {len(html_content)} chars")
+    for name, result in benchmark(html_content).items():
+        print(f"{name:22} {result['time'] * 1000:9.1f} ms  {result['chars']:>10} chars")
+
+
+if __name__ == "__main__":
+    main()
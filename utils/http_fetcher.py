@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: http_fetcher.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains pooled plain-HTTP page fetcher and heuristics telling whether the page needs JavaScript to render.
+"""
+
+import re
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36"
+MIN_TEXT_LENGTH = 200
+BODY_PATTERN = re.compile(r"<body[^>]*>(.*)</body>", re.DOTALL | re.IGNORECASE)
+INVISIBLE_PATTERN = re.compile(r"<(script|style|noscript|template)\b.*?</\1\s*>", re.DOTALL | re.IGNORECASE)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+SPA_ROOT_PATTERN = re.compile(
+    r"<(div|main)[^>]+id=[\"'](root|app|__next|__nuxt|svelte|q-app)[\"'][^>]*>\s*</\1>|<app-root[^>]*>\s*</app-root>",
+    re.IGNORECASE,
+)
+NOSCRIPT_PATTERN = re.compile(r"<noscript[^>]*>(.*?)</noscript\s*>", re.DOTALL | re.IGNORECASE)
+NOSCRIPT_MARKERS = ("enable javascript", "javascript is required", "requires javascript", "javascript to run")
+
+
+def needs_javascript(html):
+    """
+    Check whether the page fetched without browser needs JavaScript to get its content.
+
+    :param html: (str) HTML of the page.
+    :return: (str) Reason ('empty body', 'spa root', 'noscript marker'), or None if static HTML is enough.
+    """
+    if SPA_ROOT_PATTERN.search(html):
+        return "spa root"
+    for noscript in NOSCRIPT_PATTERN.findall(html):
+        text = " ".join(TAG_PATTERN.sub(" ", noscript).lower().split())
+        if any(marker in text for marker in NOSCRIPT_MARKERS):
+            return "noscript marker"
+    body = BODY_PATTERN.search(html)
+    text = TAG_PATTERN.sub(" ", INVISIBLE_PATTERN.sub(" ", body.group(1) if body else html))
+    if len(" ".join(text.split())) < MIN_TEXT_LENGTH:
+        return "empty body"
+    return None
+
+
+class HttpFetcher:
+    """The HttpFetcher class fetches pages by plain HTTP GET over pooled keep-alive connections."""
+
+    def __init__(self, timeout=10.0, pool_size=10, user_agent=USER_AGENT):
+        """
+        General init.
+
+        :param timeout: (float) Timeout of the request, in seconds.
+        :param pool_size: (int) Max count of kept-alive connections per host.
+        :param user_agent: (str) User-Agent header.
+        """
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"User-Agent": user_agent, "Accept": "text/html,application/xhtml+xml"})
+
+    def get(self, url, headers=None):
+        """
+        Get the page.
+
+        :param url: (str) URL of the page.
+        :param headers: (dict) Additional request headers.
+        :return: (requests.Response) The response.
+        """
+        return self.session.get(url, headers=headers, timeout=self.timeout)
+
+    def fetch(self, url):
+        """
+        Get HTML of the page if it may be used without browser.
+
+        :param url: (str) URL of the page.
+        :return: (tuple) HTML (or None), reason why the browser is needed (or None) and validators of the response.
+        """
+        try:
+            response = self.get(url)
+        except requests.RequestException as error:
+            return None, f"request failed: {error.__class__.__name__}", {}
+        return self.check_response(response)
+
+    def check_response(self, response):
+        """
+        Get HTML of the response if it may be used without browser.
+
+        :param response: (requests.Response) The response.
+        :return: (tuple) HTML (or None), reason why the browser is needed (or None) and validators of the response.
+        """
+        validators = self.__validators(response)
+        if response.status_code != 200:
+            return None, f"status {response.status_code}", validators
+        content_type = response.headers.get("Content-Type", "")
+        if "html" not in content_type:
+            return None, f"content type {content_type or 'unknown'}", validators
+        html = response.text
+        reason = needs_javascript(html)
+        if reason:
+            return None, reason, validators
+        return html, None, validators
+
+    @staticmethod
+    def __validators(response):
+        """
+        Get cache validators of the response.
+
+        :param response: (requests.Response) The response.
+        :return: (dict) 'etag' and 'last_modified' (may be None).
+        """
+        return {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
+    def revalidate(self, url, etag=None, last_modified=None):
+        """
+        Revalidate cached page by conditional GET.
+
+        :param url: (str) URL of the page.
+        :param etag: (str) ETag of the cached page.
+        :param last_modified: (str) Last-Modified of the cached page.
+        :return: (requests.Response) The response: '304 Not Modified' or the new page, None if there are no
+                 validators or the request failed.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        if not headers:
+            return None
+        try:
+            return self.get(url, headers=headers)
+        except requests.RequestException:
+            return None
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
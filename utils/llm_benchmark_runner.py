@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: llm_benchmark_runner.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains concurrent runner of (question x provider) benchmark matrix.
+"""
+
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import asyncio
+
+
+def is_async_callable(function):
+    """
+    Check whether function (or callable object, like TimeMetricsWrapperAsync) is a coroutine function.
+
+    :param function: The function to check.
+    :type function: callable
+    :return: True if calling function returns awaitable.
+    :rtype: bool
+    """
+    return inspect.iscoroutinefunction(function) or inspect.iscoroutinefunction(getattr(function, "__call__", None))
+
+
+class BenchmarkRunner:
+    """
+    Runner of (question x provider) benchmark matrix.
+
+    All calls are scheduled concurrently, concurrency of every provider is capped by its own semaphore and sync
+    callables (i.e. TimeMetricsWrapperSync) are executed in a thread pool, so they never block the event loop. Latency
+    is measured by wrapped functions themselves, so it doesn't include queueing time, reported as `queue_time`.
+    """
+
+    def __init__(self):
+        """Initialize BenchmarkRunner class."""
+        self.___providers = {}
+
+    def add_provider(self, name, function, concurrency=1, model=None):
+        """
+        Add provider to the benchmark.
+
+        :param name: The name of the provider (used in results).
+        :type name: str
+        :param function: The wrapped function, which accepts prompt (and model) and returns metrics dict.
+        :type function: callable
+        :param concurrency: Max count of concurrent calls to the provider.
+        :type concurrency: int
+        :param model: The model passed to the function as second argument (if set).
+        :type model: str
+        """
+        self.___providers[name] = {"function": function, "concurrency": concurrency, "model": model}
+
+    async def __call_provider(self, name, question, semaphore, executor):
+        """
+        Call the provider once, waiting for its semaphore.
+
+        :param name: The name of the provider.
+        :type name: str
+        :param question: The question (prompt).
+        :type question: str
+        :param semaphore: The semaphore of the provider.
+        :type semaphore: asyncio.Semaphore
+        :param executor: The thread pool for sync callables.
+        :type executor: ThreadPoolExecutor
+        :return: The result with provider, question, metrics and error.
+        :rtype: dict
+        """
+        provider = self.___providers[name]
+        function = provider["function"]
+        args = (question, provider["model"]) if provider["model"] else (question,)
+        result = {"provider": name, "question": question, "metrics": None, "error": None}
+        queued_at = time.perf_counter()
+        started_at = {}
+
+        def call_sync():
+            started_at["time"] = time.perf_counter()
+            return function(*args)
+
+        async with semaphore:
+            try:
+                if is_async_callable(function):
+                    started_at["time"] = time.perf_counter()
+                    metrics = await function(*args)
+                else:
+                    metrics = await asyncio.get_running_loop().run_in_executor(executor, call_sync)
+                metrics["queue_time"] = started_at["time"] - queued_at
+                result["metrics"] = metrics
+            except Exception as error:  # pylint: disable=broad-except
+                result["error"] = error
+        return result
+
+    async def run(self, questions, on_result=None):
+        """
+        Run all questions against all providers concurrently.
+
+        :param questions: The questions (prompts).
+        :type questions: Iterable[str]
+        :param on_result: Callback called with (provider, question, metrics) for every successful call as it completes,
+                          awaited if it returns awaitable (i.e. AsyncMetricsSink.put_async).
+        :type on_result: callable
+        :return: List of results (dicts with provider, question, metrics and error).
+        :rtype: list[dict]
+        """
+        semaphores = {name: asyncio.Semaphore(provider["concurrency"]) for name, provider in self.___providers.items()}
+        sync_workers = sum(
+            provider["concurrency"]
+            for provider in self.___providers.values()
+            if not is_async_callable(provider["function"])
+        )
+        results = []
+        with ThreadPoolExecutor(max_workers=max(sync_workers, 1)) as executor:
+            tasks = [
+                asyncio.ensure_future(self.__call_provider(name, question, semaphores[name], executor))
+                for question in questions
+                for name in self.___providers
+            ]
+            for task in asyncio.as_completed(tasks):
+                result = await task
+                if on_result and result["error"] is None:
+                    callback_result = on_result(result["provider"], result["question"], result["metrics"])
+                    if inspect.isawaitable(callback_result):
+                        await callback_result
+                results.append(result)
+        return results
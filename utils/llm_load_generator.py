@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: llm_load_generator.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains open-loop load generator (constant or Poisson arrivals) for LLM benchmarks.
+"""
+
+import itertools
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import asyncio
+
+from utils.llm_benchmark_runner import is_async_callable
+from utils.llm_metrics_aggregator import StreamingHistogram
+
+
+class OpenLoopLoadGenerator:
+    """
+    Open-loop load generator.
+
+    Requests are issued at the target arrival rate regardless of whether previous ones have completed, so queueing
+    under load is visible. Latency is measured from the intended send time (not the actual one), which avoids
+    coordinated omission: if the generator or the thread pool falls behind, the delay is counted as latency.
+    """
+
+    def __init__(self, function, rate, duration, distribution="poisson", max_workers=64, seed=None):
+        """
+        Initialize OpenLoopLoadGenerator class.
+
+        :param function: The wrapped function (TimeMetricsWrapperSync/Async), which accepts prompt.
+        :type function: callable
+        :param rate: Offered load, requests per second.
+        :type rate: float
+        :param duration: Duration of the load, in seconds.
+        :type duration: float
+        :param distribution: Spacing of arrivals, 'poisson' or 'constant'.
+        :type distribution: str
+        :param max_workers: Size of thread pool for sync functions.
+        :type max_workers: int
+        :param seed: Seed of random generator (for reproducible schedules).
+        :type seed: int
+        """
+        if distribution not in ("poisson", "constant"):
+            raise ValueError(f"Unknown distribution: {distribution}")
+        self.function = function
+        self.rate = rate
+        self.duration = duration
+        self.distribution = distribution
+        self.max_workers = max_workers
+        self.___rng = random.Random(seed)
+
+    def schedule(self):
+        """
+        Get intended send offsets (from the start of the load).
+
+        :return: List of offsets, in seconds.
+        :rtype: list[float]
+        """
+        offsets = []
+        offset = 0.0
+        while True:
+            if self.distribution == "poisson":
+                offset += self.___rng.expovariate(self.rate)
+            else:
+                offset += 1 / self.rate
+            if offset >= self.duration:
+                return offsets
+            offsets.append(offset)
+
+    async def __send(self, prompt, intended_time, executor):
+        """
+        Send single request and measure latency from the intended send time.
+
+        :param prompt: The prompt.
+        :type prompt: str
+        :param intended_time: Intended send time (perf_counter).
+        :type intended_time: float
+        :param executor: Thread pool for sync functions.
+        :type executor: ThreadPoolExecutor
+        :return: The result with prompt, metrics, error and timings.
+        :rtype: dict
+        """
+        result = {"prompt": prompt, "metrics": None, "error": None, "send_lag": time.perf_counter() - intended_time}
+        try:
+            if is_async_callable(self.function):
+                result["metrics"] = await self.function(prompt)
+            else:
+                result["metrics"] = await asyncio.get_running_loop().run_in_executor(executor, self.function, prompt)
+        except Exception as error:  # pylint: disable=broad-except
+            result["error"] = error
+        result["completed_at"] = time.perf_counter()
+        result["latency"] = result["completed_at"] - intended_time
+        return result
+
+    async def run(self, prompts):
+        """
+        Run the load.
+
+        :param prompts: The prompts, cycled over if there are fewer prompts than requests.
+        :type prompts: Iterable[str]
+        :return: Report with offered load, achieved throughput, latency summary and all results.
+        :rtype: dict
+        """
+        prompts = itertools.cycle(prompts)
+        tasks = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            start_time = time.perf_counter()
+            for offset in self.schedule():
+                intended_time = start_time + offset
+                delay = intended_time - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.ensure_future(self.__send(next(prompts), intended_time, executor)))
+            results = await asyncio.gather(*tasks)
+
+        latency = StreamingHistogram()
+        service_time = StreamingHistogram()
+        completed = [result for result in results if result["error"] is None]
+        for result in completed:
+            latency.add(result["latency"])
+            service_time.add(result["metrics"]["elapsed_time"])
+        last_completion = max((result["completed_at"] for result in results), default=start_time)
+        wall_time = max(last_completion - start_time, self.duration)
+
+        return {
+            "distribution": self.distribution,
+            "duration": self.duration,
+            "offered_rate": self.rate,
+            "sent": len(results),
+            "completed": len(completed),
+            "errors": len(results) - len(completed),
+            "achieved_throughput": len(completed) / wall_time if wall_time else 0,
+            "max_send_lag": max((result["send_lag"] for result in results), default=0),
+            "latency": latency.summary(),
+            "service_time": service_time.summary(),
+            "results": results,
+        }
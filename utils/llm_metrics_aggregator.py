@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: llm_metrics_aggregator.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains aggregator of time metrics produced by llm_timer_wrapper (percentiles, mean, stddev, CI).
+"""
+
+import math
+import random
+import statistics
+
+
+def bootstrap_ci(samples, confidence=0.95, resamples=1000, rng=None):
+    """
+    Calculate bootstrap confidence interval of the mean.
+
+    :param samples: The samples to resample.
+    :type samples: list[float]
+    :param confidence: Confidence level, i.e. 0.95.
+    :type confidence: float
+    :param resamples: Count of bootstrap resamples.
+    :type resamples: int
+    :param rng: Random generator to use (for reproducible results).
+    :type rng: random.Random
+    :return: Lower and upper bounds of the interval, (None, None) if there are no samples.
+    :rtype: tuple
+    """
+    if not samples:
+        return None, None
+    rng = rng or random.Random()
+    size = len(samples)
+    means = sorted(statistics.fmean(rng.choices(samples, k=size)) for _ in range(resamples))
+    alpha = (1 - confidence) / 2
+    low = means[int(alpha * (resamples - 1))]
+    high = means[int(math.ceil((1 - alpha) * (resamples - 1)))]
+    return low, high
+
+
+class StreamingHistogram:
+    """
+    Histogram with log-scaled buckets and bounded memory.
+
+    Every bucket covers values within relative `precision`, so percentiles are estimated with the same relative error
+    while memory depends only on the range of values, not on the count of samples. Mean and stddev are exact (Welford).
+    A bounded reservoir of samples is kept for bootstrap confidence intervals of the mean.
+    """
+
+    def __init__(self, precision=0.01, min_value=1e-6, reservoir_size=1000, rng=None):
+        """
+        Initialize StreamingHistogram class.
+
+        :param precision: Relative precision of buckets, i.e. 0.01 is 1%.
+        :type precision: float
+        :param min_value: Min distinguishable value, everything below goes to the zero bucket.
+        :type min_value: float
+        :param reservoir_size: Max count of samples kept for bootstrap.
+        :type reservoir_size: int
+        :param rng: Random generator to use (for reproducible results).
+        :type rng: random.Random
+        """
+        self.precision = precision
+        self.min_value = min_value
+        self.reservoir_size = reservoir_size
+        self.buckets = {}
+        self.reservoir = []
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.___mean = 0.0
+        self.___m2 = 0.0
+        self.___log_base = math.log1p(precision)
+        self.___rng = rng or random.Random()
+
+    def __bucket_index(self, value):
+        """
+        Get bucket index for the value.
+
+        :param value: The value.
+        :type value: float
+        :return: Bucket index, -1 is the zero bucket.
+        :rtype: int
+        """
+        if value < self.min_value:
+            return -1
+        return int(math.log(value / self.min_value) / self.___log_base)
+
+    def __bucket_value(self, index):
+        """
+        Get representative (middle) value of the bucket.
+
+        :param index: Bucket index.
+        :type index: int
+        :return: The value.
+        :rtype: float
+        """
+        if index < 0:
+            return 0.0
+        return self.min_value * (1 + self.precision) ** (index + 0.5)
+
+    def add(self, value):
+        """
+        Add value to the histogram.
+
+        :param value: The value, should be non-negative.
+        :type value: float
+        """
+        index = self.__bucket_index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+        delta = value - self.___mean
+        self.___mean += delta / self.count
+        self.___m2 += delta * (value - self.___mean)
+
+        if len(self.reservoir) < self.reservoir_size:
+            self.reservoir.append(value)
+        else:
+            slot = self.___rng.randrange(self.count)
+            if slot < self.reservoir_size:
+                self.reservoir[slot] = value
+
+    def merge(self, other):
+        """
+        Merge other histogram (with the same precision and min_value) into this one.
+
+        :param other: The histogram to merge.
+        :type other: StreamingHistogram
+        """
+        if not other.count:
+            return
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        total = self.count + other.count
+        if total <= self.reservoir_size:
+            # both reservoirs hold all their samples
+            self.reservoir = self.reservoir + other.reservoir
+        else:
+            # every reservoir represents its own count of samples, so they're sampled proportionally
+            own_share = min(round(self.reservoir_size * self.count / total), len(self.reservoir))
+            other_share = min(self.reservoir_size - own_share, len(other.reservoir))
+            self.reservoir = self.___rng.sample(self.reservoir, own_share) + self.___rng.sample(
+                other.reservoir, other_share
+            )
+        delta = other.mean - self.___mean
+        self.___m2 += other.___m2 + delta * delta * self.count * other.count / total
+        self.___mean += delta * other.count / total
+        self.count = total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    @property
+    def mean(self):
+        """
+        Mean of values.
+
+        :return: The mean.
+        :rtype: float
+        """
+        return self.___mean
+
+    @property
+    def stddev(self):
+        """
+        Sample standard deviation of values.
+
+        :return: The standard deviation.
+        :rtype: float
+        """
+        return math.sqrt(self.___m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def percentile(self, percent):
+        """
+        Estimate percentile of values.
+
+        :param percent: The percentile, i.e. 99 for p99.
+        :type percent: float
+        :return: The estimated value or None if histogram is empty.
+        :rtype: float | None
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(max(self.__bucket_value(index), self.min), self.max)
+        return self.max
+
+    def confidence_interval(self, confidence=0.95, resamples=1000):
+        """
+        Calculate confidence interval of the mean.
+
+        The interval is bootstrapped from the reservoir. When the reservoir holds only part of samples, the interval
+        is centered on the exact mean and its bounds are scaled by sqrt(len(reservoir) / count), since bootstrap of
+        the reservoir estimates the spread of the mean of len(reservoir) samples, not of all of them.
+
+        :param confidence: Confidence level, i.e. 0.95.
+        :type confidence: float
+        :param resamples: Count of bootstrap resamples.
+        :type resamples: int
+        :return: Lower and upper bounds of the interval, (None, None) if histogram is empty.
+        :rtype: tuple
+        """
+        low, high = bootstrap_ci(self.reservoir, confidence, resamples, self.___rng)
+        if low is None or len(self.reservoir) >= self.count:
+            return low, high
+        reservoir_mean = statistics.fmean(self.reservoir)
+        scale = math.sqrt(len(self.reservoir) / self.count)
+        return self.mean - (reservoir_mean - low) * scale, self.mean + (high - reservoir_mean) * scale
+
+    def summary(self, percentiles=(50, 90, 99), confidence=0.95, resamples=1000):
+        """
+        Get summary of the histogram.
+
+        :param percentiles: Percentiles to report.
+        :type percentiles: tuple
+        :param confidence: Confidence level of bootstrap interval of the mean.
+        :type confidence: float
+        :param resamples: Count of bootstrap resamples.
+        :type resamples: int
+        :return: The summary.
+        :rtype: dict
+        """
+        ci_low, ci_high = self.confidence_interval(confidence, resamples)
+        summary = {
+            "count": self.count,
+            "mean": self.mean,
+            "stddev": self.stddev,
+            "min": self.min,
+            "max": self.max,
+        }
+        for percent in percentiles:
+            summary[f"p{percent}"] = self.percentile(percent)
+        summary["ci_low"] = ci_low
+        summary["ci_high"] = ci_high
+        return summary
+
+
+class MetricsAggregator:
+    """Aggregator of metric dicts per (model, question)."""
+
+    def __init__(self, fields=("elapsed_time", "token_speed"), precision=0.01, reservoir_size=1000, seed=None):
+        """
+        Initialize MetricsAggregator class.
+
+        :param fields: Fields of metrics to aggregate. Missing fields in metrics are skipped.
+        :type fields: tuple[str]
+        :param precision: Relative precision of histogram buckets.
+        :type precision: float
+        :param reservoir_size: Max count of samples kept per field for bootstrap.
+        :type reservoir_size: int
+        :param seed: Seed of random generator (for reproducible reports).
+        :type seed: int
+        """
+        self.fields = fields
+        self.precision = precision
+        self.reservoir_size = reservoir_size
+        self.___rng = random.Random(seed)
+        self.___histograms = {}
+
+    def add(self, model, question, metrics):
+        """
+        Add metrics of single call.
+
+        :param model: The name of the model.
+        :type model: str
+        :param question: The question (prompt).
+        :type question: str
+        :param metrics: The metrics produced by TimeMetricsWrapper.
+        :type metrics: dict
+        """
+        histograms = self.___histograms.setdefault((model, question), {})
+        for field in self.fields:
+            value = metrics.get(field)
+            if value is None:
+                continue
+            if field not in histograms:
+                histograms[field] = StreamingHistogram(
+                    precision=self.precision, reservoir_size=self.reservoir_size, rng=self.___rng
+                )
+            histograms[field].add(value)
+
+    def histogram(self, model, question, field):
+        """
+        Get histogram of the field.
+
+        :param model: The name of the model.
+        :type model: str
+        :param question: The question (prompt).
+        :type question: str
+        :param field: The metric field.
+        :type field: str
+        :return: The histogram or None.
+        :rtype: StreamingHistogram | None
+        """
+        return self.___histograms.get((model, question), {}).get(field)
+
+    def report(self, percentiles=(50, 90, 99), confidence=0.95, resamples=1000):
+        """
+        Get report for all (model, question) pairs.
+
+        :param percentiles: Percentiles to report.
+        :type percentiles: tuple
+        :param confidence: Confidence level of bootstrap interval of the mean.
+        :type confidence: float
+        :param resamples: Count of bootstrap resamples.
+        :type resamples: int
+        :return: Report, dict of {(model, question): {field: summary}}.
+        :rtype: dict
+        """
+        return {
+            key: {
+                field: histogram.summary(percentiles, confidence, resamples) for field, histogram in histograms.items()
+            }
+            for key, histograms in self.___histograms.items()
+        }
+
+    def report_rows(self, percentiles=(50, 90, 99), confidence=0.95, resamples=1000):
+        """
+        Get report as flat rows (i.e. to save to csv).
+
+        :param percentiles: Percentiles to report.
+        :type percentiles: tuple
+        :param confidence: Confidence level of bootstrap interval of the mean.
+        :type confidence: float
+        :param resamples: Count of bootstrap resamples.
+        :type resamples: int
+        :return: List of rows.
+        :rtype: list[dict]
+        """
+        rows = []
+        for (model, question), fields in self.report(percentiles, confidence, resamples).items():
+            for field, summary in fields.items():
+                rows.append({"model": model, "question": question, "metric": field, **summary})
+        return rows
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: llm_mock_server.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains local mock server of LLM providers with configurable latency profiles.
+
+Served endpoints (point clients to http://host:port):
+- POST /v1/chat/completions - OpenAI-compatible chat (JSON or SSE stream)
+- POST /chat/completions - Llama API (same format as OpenAI), i.e. LlamaAPI(token, hostname="http://host:port")
+- POST /v1/generate - Cohere generate (JSON or newline-delimited JSON stream)
+- POST /v1/chat - ABLT chat (JSON or SSE stream), i.e. ABLTApi(token, base_api_url="http://host:port")
+- GET /stats - count of served requests and errors
+
+Usage: PYTHONPATH=. python -m utils.llm_mock_server --port 8080 --ttft 0.3 --token-rate 50 --jitter 0.1
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from uuid import uuid4
+
+import asyncio
+from aiohttp import web
+
+WORDS = ("lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit", "sed", "do", "eiusmod")
+
+
+class LatencyProfile:
+    """Latency profile of the mock provider."""
+
+    def __init__(self, ttft=0.3, token_rate=50.0, jitter=0.0, error_rate=0.0, error_status=500, tokens=100, seed=None):
+        """
+        Initialize LatencyProfile class.
+
+        :param ttft: Time to first token, in seconds.
+        :type ttft: float
+        :param token_rate: Tokens per second after the first token.
+        :type token_rate: float
+        :param jitter: Relative jitter of every delay, i.e. 0.1 is +-10%.
+        :type jitter: float
+        :param error_rate: Share of requests answered with error, 0..1.
+        :type error_rate: float
+        :param error_status: HTTP status of errors. For 429 'Retry-After' header is added.
+        :type error_status: int
+        :param tokens: Count of tokens (words) in every response.
+        :type tokens: int
+        :param seed: Seed of random generator (for reproducible runs).
+        :type seed: int
+        """
+        self.ttft = ttft
+        self.token_rate = token_rate
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.tokens = tokens
+        self.rng = random.Random(seed)
+
+    def delay(self, base):
+        """
+        Apply jitter to the delay.
+
+        :param base: Base delay, in seconds.
+        :type base: float
+        :return: Delay with jitter.
+        :rtype: float
+        """
+        if not self.jitter:
+            return base
+        return max(0.0, base * (1 + self.rng.uniform(-self.jitter, self.jitter)))
+
+    def token_delay(self):
+        """
+        Delay between two tokens.
+
+        :return: Delay with jitter, in seconds.
+        :rtype: float
+        """
+        return self.delay(1 / self.token_rate) if self.token_rate else 0.0
+
+    def is_error(self):
+        """
+        Decide whether the request should fail.
+
+        :return: True if request should fail.
+        :rtype: bool
+        """
+        return self.rng.random() < self.error_rate
+
+    def tokens_list(self):
+        """
+        Generate tokens of the response.
+
+        :return: List of tokens (words with trailing space).
+        :rtype: list[str]
+        """
+        return [f"{WORDS[index % len(WORDS)]} " for index in range(self.tokens)]
+
+
+class MockLLMServer:
+    """Local HTTP stand-in for OpenAI, Llama, Cohere and ABLT endpoints."""
+
+    def __init__(self, profile=None):
+        """
+        Initialize MockLLMServer class.
+
+        :param profile: Latency profile, used for all endpoints.
+        :type profile: LatencyProfile
+        """
+        self.profile = profile or LatencyProfile()
+        self.stats = {"requests": 0, "errors": 0}
+        self.app = web.Application()
+        self.app.add_routes(
+            [
+                web.post("/v1/chat/completions", self.openai_chat),
+                web.post("/chat/completions", self.openai_chat),
+                web.post("/v1/generate", self.cohere_generate),
+                web.post("/v1/chat", self.ablt_chat),
+                web.get("/stats", self.get_stats),
+            ]
+        )
+        self.___runner = None
+        self.___loop = None
+        self.___thread = None
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """
+        Start the server in the current event loop.
+
+        :param host: Host to bind.
+        :type host: str
+        :param port: Port to bind.
+        :type port: int
+        """
+        self.___runner = web.AppRunner(self.app)
+        await self.___runner.setup()
+        await web.TCPSite(self.___runner, host, port).start()
+
+    async def stop(self):
+        """Stop the server."""
+        if self.___runner:
+            await self.___runner.cleanup()
+            self.___runner = None
+
+    def start_in_thread(self, host="127.0.0.1", port=8080):
+        """
+        Start the server in its own event loop in background thread.
+
+        Use it when the server runs in the same process as measured clients: its delays, encoding and writes then
+        don't run in the event loop of the clients and don't add to their measured time.
+
+        :param host: Host to bind.
+        :type host: str
+        :param port: Port to bind.
+        :type port: int
+        """
+        self.___loop = asyncio.new_event_loop()
+        self.___thread = threading.Thread(target=self.___loop.run_forever, name="mock-llm-server", daemon=True)
+        self.___thread.start()
+        asyncio.run_coroutine_threadsafe(self.start(host, port), self.___loop).result()
+
+    def stop_in_thread(self):
+        """Stop the server started by `start_in_thread` and its event loop."""
+        if self.___loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop(), self.___loop).result()
+        self.___loop.call_soon_threadsafe(self.___loop.stop)
+        self.___thread.join()
+        self.___loop.close()
+        self.___loop = None
+        self.___thread = None
+
+    async def get_stats(self, _request):
+        """
+        Return statistics of served requests.
+
+        :param _request: The request.
+        :type _request: web.Request
+        :return: JSON response with stats.
+        :rtype: web.Response
+        """
+        return web.json_response(self.stats)
+
+    def __error_response(self):
+        """
+        Build error response according to profile.
+
+        :return: Error response or None if request shouldn't fail.
+        :rtype: web.Response | None
+        """
+        self.stats["requests"] += 1
+        if not self.profile.is_error():
+            return None
+        self.stats["errors"] += 1
+        headers = {"Retry-After": "1"} if self.profile.error_status == 429 else None
+        return web.json_response({"detail": "Mocked error"}, status=self.profile.error_status, headers=headers)
+
+    async def __stream(self, request, content_type, chunks):
+        """
+        Stream chunks to the client according to profile.
+
+        :param request: The request.
+        :type request: web.Request
+        :param content_type: Content type of the response.
+        :type content_type: str
+        :param chunks: Iterable of (token, payload bytes) pairs, payload is sent after the delay.
+        :type chunks: Iterable
+        :return: Streamed response.
+        :rtype: web.StreamResponse
+        """
+        response = web.StreamResponse(headers={"Content-Type": content_type})
+        await response.prepare(request)
+        await asyncio.sleep(self.profile.delay(self.profile.ttft))
+        first = True
+        for payload in chunks:
+            if not first:
+                await asyncio.sleep(self.profile.token_delay())
+            first = False
+            await response.write(payload)
+        await response.write_eof()
+        return response
+
+    async def __complete(self):
+        """
+        Wait for the whole (non-streamed) response to be "generated".
+
+        :return: Content of the response.
+        :rtype: str
+        """
+        tokens = self.profile.tokens_list()
+        delay = self.profile.delay(self.profile.ttft) + sum(self.profile.token_delay() for _ in tokens[1:])
+        await asyncio.sleep(delay)
+        return "".join(tokens)
+
+    async def openai_chat(self, request):
+        """
+        OpenAI-compatible chat completions endpoint.
+
+        :param request: The request.
+        :type request: web.Request
+        :return: The response.
+        :rtype: web.StreamResponse
+        """
+        body = await request.json()
+        error = self.__error_response()
+        if error:
+            return error
+        completion_id = f"chatcmpl-{uuid4().hex}"
+        model = body.get("model", "mock")
+        if body.get("stream"):
+
+            def chunks():
+                for token in self.profile.tokens_list():
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+                yield b"data: [DONE]\n\n"
+
+            return await self.__stream(request, "text/event-stream", chunks())
+        content = await self.__complete()
+        return web.json_response(
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                ],
+                "usage": {"prompt_tokens": 0, "completion_tokens": self.profile.tokens, "total_tokens": 0},
+            }
+        )
+
+    async def cohere_generate(self, request):
+        """
+        Cohere generate endpoint.
+
+        :param request: The request.
+        :type request: web.Request
+        :return: The response.
+        :rtype: web.StreamResponse
+        """
+        body = await request.json()
+        error = self.__error_response()
+        if error:
+            return error
+        generation_id = str(uuid4())
+        if body.get("stream"):
+
+            def chunks():
+                tokens = self.profile.tokens_list()
+                for token in tokens:
+                    yield (json.dumps({"text": token, "is_finished": False}) + "\n").encode("utf-8")
+                final = {
+                    "is_finished": True,
+                    "finish_reason": "COMPLETE",
+                    "response": {"id": generation_id, "generations": [{"id": generation_id, "text": "".join(tokens)}]},
+                }
+                yield (json.dumps(final) + "\n").encode("utf-8")
+
+            return await self.__stream(request, "application/stream+json", chunks())
+        content = await self.__complete()
+        return web.json_response(
+            {
+                "id": generation_id,
+                "generations": [{"id": generation_id, "text": content, "finish_reason": "COMPLETE"}],
+                "prompt": body.get("prompt", ""),
+            }
+        )
+
+    async def ablt_chat(self, request):
+        """
+        ABLT chat endpoint.
+
+        :param request: The request.
+        :type request: web.Request
+        :return: The response.
+        :rtype: web.StreamResponse
+        """
+        body = await request.json()
+        error = self.__error_response()
+        if error:
+            return error
+        if body.get("stream"):
+
+            def chunks():
+                for token in self.profile.tokens_list():
+                    yield f"data: {json.dumps({'content': token})}\n\n".encode("utf-8")
+                yield b"data: [DONE]\n\n"
+
+            return await self.__stream(request, "text/event-stream", chunks())
+        return web.json_response({"content": await self.__complete()})
+
+
+async def serve(host, port, profile):
+    """
+    Run mock server forever.
+
+    :param host: Host to bind.
+    :type host: str
+    :param port: Port to bind.
+    :type port: int
+    :param profile: Latency profile.
+    :type profile: LatencyProfile
+    """
+    server = MockLLMServer(profile)
+    await server.start(host, port)
+    print(f"Mock LLM server is listening on http://{host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main(args_list=None):
+    """
+    Main function to run mock server from command line.
+
+    :param args_list: List of command-line arguments. If None, uses sys.argv.
+    :type args_list: list[str] | None
+    """
+    parser = argparse.ArgumentParser(description="Local mock server of LLM providers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--ttft", type=float, default=0.3, help="time to first token, seconds")
+    parser.add_argument("--token-rate", type=float, default=50.0, help="tokens per second")
+    parser.add_argument("--jitter", type=float, default=0.0, help="relative jitter, i.e. 0.1")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of failed requests, 0..1")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--tokens", type=int, default=100, help="tokens in every response")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(args_list)
+    profile = LatencyProfile(
+        ttft=args.ttft,
+        token_rate=args.token_rate,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        tokens=args.tokens,
+        seed=args.seed,
+    )
+    try:
+        asyncio.run(serve(args.host, args.port, profile))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: llm_rate_limiter.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains token-bucket rate limiter (requests-per-minute and tokens-per-minute) for LLM calls.
+"""
+
+import functools
+import re
+import threading
+import time
+
+import asyncio
+
+from utils.llm_benchmark_runner import is_async_callable
+from utils.llm_tokenizers import count_tokens
+
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value):
+    """
+    Parse duration from rate-limit headers, i.e. '1s', '6m0s', '20ms' or plain seconds '0.5'.
+
+    :param value: The duration.
+    :type value: str
+    :return: Duration in seconds or None if it can't be parsed.
+    :rtype: float | None
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    parts = DURATION_PATTERN.findall(value or "")
+    if not parts:
+        return None
+    return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+
+
+def find_cache_check(function):
+    """
+    Find `is_cached` check of ResponseCache.cached function under the decorated one (directly, through
+    functools.wraps or TimeMetricsWrapper).
+
+    :param function: The decorated function.
+    :type function: callable
+    :return: The check or None if the function isn't cached.
+    :rtype: callable | None
+    """
+    seen = set()
+    while function is not None and id(function) not in seen:
+        seen.add(id(function))
+        check = getattr(function, "is_cached", None)
+        if check is not None:
+            return check
+        function = getattr(function, "__wrapped__", None) or getattr(function, "function", None)
+    return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Amount is reserved immediately (bucket may go into debt), so concurrent callers are served in order of arrival
+    and every caller knows exactly how long to wait.
+    """
+
+    def __init__(self, capacity, refill_rate):
+        """
+        Initialize TokenBucket class.
+
+        :param capacity: Max amount in the bucket (burst size).
+        :type capacity: float
+        :param refill_rate: Amount added per second.
+        :type refill_rate: float
+        """
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.level = capacity
+        self.___updated_at = time.monotonic()
+        self.___lock = threading.Lock()
+
+    def __refill(self, now):
+        """
+        Refill the bucket. Should be called under the lock.
+
+        :param now: Current time (monotonic).
+        :type now: float
+        """
+        self.level = min(self.capacity, self.level + (now - self.___updated_at) * self.refill_rate)
+        self.___updated_at = now
+
+    def reserve(self, amount):
+        """
+        Reserve amount from the bucket.
+
+        :param amount: The amount to reserve. Amount above capacity is clamped to capacity.
+        :type amount: float
+        :return: Time to wait before the reserved amount is available, in seconds.
+        :rtype: float
+        """
+        with self.___lock:
+            now = time.monotonic()
+            self.__refill(now)
+            self.level -= min(amount, self.capacity)
+            if self.level >= 0:
+                return 0.0
+            return -self.level / self.refill_rate
+
+    def update(self, capacity=None, remaining=None, reset=None):
+        """
+        Adjust the bucket to the state reported by the provider.
+
+        :param capacity: Actual limit (per minute).
+        :type capacity: float
+        :param remaining: Actual remaining amount.
+        :type remaining: float
+        :param reset: Time until the amount is fully restored, in seconds.
+        :type reset: float
+        """
+        with self.___lock:
+            self.__refill(time.monotonic())
+            if capacity:
+                self.capacity = capacity
+                self.refill_rate = capacity / 60
+            if remaining is None:
+                return
+            self.level = min(self.level, remaining)
+            # Rate comes from the state of the provider only: local debt (reserved, but not sent calls) isn't refilled
+            # faster by the provider, so it must not raise the rate
+            if reset and self.capacity > remaining:
+                self.refill_rate = (self.capacity - remaining) / reset
+
+    def pause(self, seconds):
+        """
+        Drain the bucket, so nothing is available for the given time (i.e. after 429 with 'Retry-After').
+
+        :param seconds: Time to pause, in seconds.
+        :type seconds: float
+        """
+        with self.___lock:
+            self.__refill(time.monotonic())
+            self.level = min(self.level, -seconds * self.refill_rate)
+
+
+class RateLimiter:
+    """
+    Rate limiter with separate requests-per-minute and tokens-per-minute buckets per provider and model.
+
+    Token usage of the call is estimated from the prompt (plus expected output tokens). Limits are adjusted from
+    rate-limit response headers (OpenAI style 'x-ratelimit-*') when they are passed to `update_from_headers`.
+    """
+
+    def __init__(self):
+        """Initialize RateLimiter class."""
+        self.___buckets = {}
+        self.___lock = threading.Lock()
+
+    def configure(self, provider, model=None, rpm=None, tpm=None):
+        """
+        Set limits of the provider (and model). Limits of (provider, None) are used for models without own limits.
+
+        :param provider: The name of the provider.
+        :type provider: str
+        :param model: The name of the model.
+        :type model: str
+        :param rpm: Requests per minute.
+        :type rpm: float
+        :param tpm: Tokens per minute.
+        :type tpm: float
+        """
+        with self.___lock:
+            self.___buckets[(provider, model)] = {
+                "requests": TokenBucket(rpm, rpm / 60) if rpm else None,
+                "tokens": TokenBucket(tpm, tpm / 60) if tpm else None,
+            }
+
+    def buckets(self, provider, model=None):
+        """
+        Get buckets of the provider and model.
+
+        :param provider: The name of the provider.
+        :type provider: str
+        :param model: The name of the model.
+        :type model: str
+        :return: Dict with 'requests' and 'tokens' buckets (may be None) or None if limits are not set.
+        :rtype: dict | None
+        """
+        with self.___lock:
+            return self.___buckets.get((provider, model)) or self.___buckets.get((provider, None))
+
+    def reserve(self, provider, model=None, prompt=None, tokens=None):
+        """
+        Reserve one request and tokens of the call.
+
+        :param provider: The name of the provider.
+        :type provider: str
+        :param model: The name of the model.
+        :type model: str
+        :param prompt: The prompt, used to estimate tokens if `tokens` is not set.
+        :type prompt: str
+        :param tokens: Count of tokens of the call.
+        :type tokens: int
+        :return: Time to wait before the call, in seconds.
+        :rtype: float
+        """
+        buckets = self.buckets(provider, model)
+        if not buckets:
+            return 0.0
+        wait = 0.0
+        if buckets["requests"]:
+            wait = buckets["requests"].reserve(1)
+        if buckets["tokens"]:
+            if tokens is None:
+                tokens = count_tokens(prompt or "", model)
+            wait = max(wait, buckets["tokens"].reserve(tokens))
+        return wait
+
+    def acquire(self, provider, model=None, prompt=None, tokens=None):
+        """
+        Wait (blocking) until the call is allowed.
+
+        :param provider: The name of the provider.
+        :type provider: str
+        :param model: The name of the model.
+        :type model: str
+        :param prompt: The prompt, used to estimate tokens if `tokens` is not set.
+        :type prompt: str
+        :param tokens: Count of tokens of the call.
+        :type tokens: int
+        :return: Time waited, in seconds.
+        :rtype: float
+        """
+        wait = self.reserve(provider, model, prompt, tokens)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, provider, model=None, prompt=None, tokens=None):
+        """
+        Wait (non-blocking) until the call is allowed.
+
+        :param provider: The name of the provider.
+        :type provider: str
+        :param model: The name of the model.
+        :type model: str
+        :param prompt: The prompt, used to estimate tokens if `tokens` is not set.
+        :type prompt: str
+        :param tokens: Count of tokens of the call.
+        :type tokens: int
+        :return: Time waited, in seconds.
+        :rtype: float
+        """
+        wait = self.reserve(provider, model, prompt, tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def update_from_headers(self, provider, model, headers):
+        """
+        Adjust buckets from rate-limit response headers.
+
+        Supported headers: 'x-ratelimit-limit-requests', 'x-ratelimit-remaining-requests',
+        'x-ratelimit-reset-requests', the same for '-tokens', and 'Retry-After'.
+
+        :param provider: The name of the provider.
+        :type provider: str
+        :param model: The name of the model.
+        :type model: str
+        :param headers: Response headers.
+        :type headers: Mapping
+        """
+        buckets = self.buckets(provider, model)
+        if not buckets or not headers:
+            return
+        headers = {key.lower(): value for key, value in headers.items()}
+        for kind in ("requests", "tokens"):
+            bucket = buckets[kind]
+            if bucket is None:
+                continue
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            bucket.update(
+                capacity=float(limit) if limit else None,
+                remaining=float(remaining) if remaining else None,
+                reset=parse_duration(headers.get(f"x-ratelimit-reset-{kind}")),
+            )
+        retry_after = parse_duration(headers.get("retry-after"))
+        if retry_after:
+            for bucket in buckets.values():
+                if bucket:
+                    bucket.pause(retry_after)
+
+    def limit(self, provider, model=None, output_tokens=0, skip=None):
+        """
+        Decorator waiting for the rate limiter before the call (sync or coroutine function).
+
+        Put it over TimeMetricsWrapperSync/Async, so waiting time isn't counted as latency. Prompt is taken from the
+        first argument (or 'prompt' keyword), model (if not set) from the second one. Calls answered from cache
+        (ResponseCache.cached function under the decorator) don't reserve limits and don't wait.
+
+        :param provider: The name of the provider.
+        :type provider: str
+        :param model: The name of the model.
+        :type model: str
+        :param output_tokens: Expected count of output tokens, added to prompt tokens.
+        :type output_tokens: int
+        :param skip: Check getting call arguments, limits are skipped when it's true. `is_cached` of cached function
+                     under the decorator by default.
+        :type skip: callable
+        :return: The decorator.
+        :rtype: function
+        """
+
+        def get_call_args(args, kwargs):
+            prompt = args[0] if args else kwargs.get("prompt", "")
+            call_model = model or (args[1] if len(args) > 1 else None)
+            return call_model, count_tokens(prompt, call_model) + output_tokens
+
+        def decorator(function):
+            check = skip or find_cache_check(function)
+
+            if is_async_callable(function):
+
+                @functools.wraps(function)
+                async def async_wrapper(*args, **kwargs):
+                    if check is None or not check(*args, **kwargs):
+                        call_model, tokens = get_call_args(args, kwargs)
+                        await self.acquire_async(provider, call_model, tokens=tokens)
+                    return await function(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if check is None or not check(*args, **kwargs):
+                    call_model, tokens = get_call_args(args, kwargs)
+                    self.acquire(provider, call_model, tokens=tokens)
+                return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: llm_response_cache.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains disk-backed, content-addressed cache of LLM responses (SQLite).
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    Disk-backed cache of LLM responses.
+
+    Entries are keyed by hash of (provider, model, prompt, parameters), expire after TTL and the least recently used
+    ones are evicted when the total size exceeds the limit. When `bypass` is set, cache is neither read nor written,
+    so timed benchmark runs stay honest, while development runs may reuse responses. The database is opened on first
+    use, so bypassed cache doesn't create the file.
+    """
+
+    def __init__(self, path="llm_cache.sqlite", max_size=100 * 1024 * 1024, ttl=7 * 24 * 3600, bypass=False):
+        """
+        Initialize ResponseCache class.
+
+        :param path: Path to SQLite file.
+        :type path: str
+        :param max_size: Max total size of cached responses, in bytes.
+        :type max_size: int
+        :param ttl: Time to live of entries, in seconds. None means entries never expire.
+        :type ttl: float | None
+        :param bypass: Bypass the cache (i.e. for measurement runs).
+        :type bypass: bool
+        """
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.bypass = bypass
+        self.___lock = threading.Lock()
+        self.___connection = None
+
+    def __connect(self):
+        """
+        Get connection to the database, it's opened (and the file is created) on first use. Should be called under
+        the lock.
+
+        :return: The connection.
+        :rtype: sqlite3.Connection
+        """
+        if self.___connection is None:
+            self.___connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.___connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self.___connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+            self.___connection.commit()
+        return self.___connection
+
+    @staticmethod
+    def make_key(provider, model, prompt, params=None):
+        """
+        Make cache key.
+
+        :param provider: The name of the provider.
+        :type provider: str
+        :param model: The name of the model.
+        :type model: str
+        :param prompt: The prompt.
+        :type prompt: str
+        :param params: Other parameters of the request (should be JSON-serializable).
+        :type params: dict
+        :return: SHA-256 hex digest.
+        :rtype: str
+        """
+        payload = json.dumps([provider, model, prompt, params or {}], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Get cached response.
+
+        :param key: The cache key.
+        :type key: str
+        :return: Cached response or None if there is no (alive) entry.
+        :rtype: Any
+        """
+        now = time.time()
+        with self.___lock:
+            connection = self.__connect()
+            row = connection.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and now - row[1] > self.ttl:
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                connection.commit()
+                return None
+            connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            connection.commit()
+        return json.loads(row[0])
+
+    def contains(self, key):
+        """
+        Check whether there is alive entry of the key (without touching it).
+
+        :param key: The cache key.
+        :type key: str
+        :return: True if response is cached.
+        :rtype: bool
+        """
+        with self.___lock:
+            row = self.__connect().execute("SELECT created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        return row is not None and (self.ttl is None or time.time() - row[0] <= self.ttl)
+
+    def set(self, key, value):
+        """
+        Store response in the cache and evict old entries if needed.
+
+        :param key: The cache key.
+        :type key: str
+        :param value: The response (should be JSON-serializable).
+        :type value: Any
+        """
+        now = time.time()
+        data = json.dumps(value, ensure_ascii=False)
+        with self.___lock:
+            connection = self.__connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data.encode("utf-8")), now, now),
+            )
+            self.__evict(now)
+            connection.commit()
+
+    def __evict(self, now):
+        """
+        Delete expired entries and least recently used ones above the size limit. Should be called under the lock.
+
+        :param now: Current time.
+        :type now: float
+        """
+        if self.ttl is not None:
+            self.___connection.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        total_size = self.___connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total_size <= self.max_size:
+            return
+        stale_keys = []
+        for key, size in self.___connection.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if total_size <= self.max_size:
+                break
+            stale_keys.append((key,))
+            total_size -= size
+        self.___connection.executemany("DELETE FROM responses WHERE key = ?", stale_keys)
+
+    def clear(self):
+        """Delete all entries."""
+        with self.___lock:
+            connection = self.__connect()
+            connection.execute("DELETE FROM responses")
+            connection.commit()
+
+    def close(self):
+        """Close the database."""
+        with self.___lock:
+            if self.___connection is not None:
+                self.___connection.close()
+                self.___connection = None
+
+    def cached(self, provider, model=None, **params):
+        """
+        Decorator caching responses of provider call function.
+
+        Decorated function should accept prompt as first argument, other arguments are part of the key. Works for
+        sync functions, coroutine functions and async generator functions (chunks are joined into one response).
+        Put it under TimeMetricsWrapper, so cache hits are timed as instant responses. Decorated function gets
+        `is_cached(prompt, *args, **kwargs)` check, used by RateLimiter.limit to skip limits on cache hits.
+
+        :param provider: The name of the provider.
+        :type provider: str
+        :param model: The name of the model.
+        :type model: str
+        :param params: Other parameters of the request, which affect the response.
+        :type params: dict
+        :return: The decorator.
+        :rtype: function
+        """
+
+        def decorator(function):
+            def make_key(prompt, args, kwargs):
+                return self.make_key(provider, model, prompt, {**params, "args": args, "kwargs": kwargs})
+
+            def is_cached(prompt, *args, **kwargs):
+                return not self.bypass and self.contains(make_key(prompt, args, kwargs))
+
+            if inspect.isasyncgenfunction(function):
+
+                @functools.wraps(function)
+                async def async_gen_wrapper(prompt, *args, **kwargs):
+                    if self.bypass:
+                        async for chunk in function(prompt, *args, **kwargs):
+                            yield chunk
+                        return
+                    key = make_key(prompt, args, kwargs)
+                    response = self.get(key)
+                    if response is not None:
+                        yield response
+                        return
+                    chunks = []
+                    async for chunk in function(prompt, *args, **kwargs):
+                        chunks.append(chunk)
+                        yield chunk
+                    self.set(key, "".join(chunks))
+
+                async_gen_wrapper.is_cached = is_cached
+                return async_gen_wrapper
+
+            if inspect.iscoroutinefunction(function):
+
+                @functools.wraps(function)
+                async def async_wrapper(prompt, *args, **kwargs):
+                    if self.bypass:
+                        return await function(prompt, *args, **kwargs)
+                    key = make_key(prompt, args, kwargs)
+                    response = self.get(key)
+                    if response is None:
+                        response = await function(prompt, *args, **kwargs)
+                        self.set(key, response)
+                    return response
+
+                async_wrapper.is_cached = is_cached
+                return async_wrapper
+
+            @functools.wraps(function)
+            def wrapper(prompt, *args, **kwargs):
+                if self.bypass:
+                    return function(prompt, *args, **kwargs)
+                key = make_key(prompt, args, kwargs)
+                response = self.get(key)
+                if response is None:
+                    response = function(prompt, *args, **kwargs)
+                    self.set(key, response)
+                return response
+
+            wrapper.is_cached = is_cached
+            return wrapper
+
+        return decorator
@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: llm_retry_policy.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains retry policy (exponential backoff with jitter, Retry-After) and circuit breakers for LLM calls.
+"""
+
+import email.utils
+import functools
+import random
+import threading
+import time
+
+import asyncio
+
+from utils.llm_benchmark_runner import is_async_callable
+
+# Statuses of responses which may succeed on retry (timeout, rate limit and server errors)
+TRANSIENT_STATUSES = frozenset((408, 429))
+# Parts of names of timeout and connection errors of HTTP clients (i.e. requests.ConnectTimeout,
+# openai.APIConnectionError, httpx.ConnectError), which aren't subclasses of builtin TimeoutError / ConnectionError
+TRANSIENT_ERROR_NAMES = ("Timeout", "Connect")
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker of the provider is open (the backend is considered down)."""
+
+
+def get_status_code(error):
+    """
+    Get HTTP status of the error response.
+
+    :param error: The exception raised by the provider call (requests, aiohttp, openai, etc.).
+    :type error: Exception
+    :return: The status or None if the error isn't HTTP error.
+    :rtype: int | None
+    """
+    for source in (error, getattr(error, "response", None)):
+        for name in ("status_code", "status"):
+            value = getattr(source, name, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def is_transient_error(error):
+    """
+    Check whether the error is transient: timeout, connection error, 408, 429 or 5xx response.
+
+    Permanent errors (auth errors, bad requests, parsing errors, etc.) won't succeed on retry.
+
+    :param error: The exception raised by the provider call.
+    :type error: Exception
+    :return: True if the call should be retried.
+    :rtype: bool
+    """
+    status = get_status_code(error)
+    if status is not None:
+        return status in TRANSIENT_STATUSES or status >= 500
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return any(part in cls.__name__ for cls in type(error).__mro__ for part in TRANSIENT_ERROR_NAMES)
+
+
+def get_retry_after(error):
+    """
+    Get delay requested by the server via 'Retry-After' header of the error response.
+
+    :param error: The exception raised by the provider call (requests, aiohttp, openai, etc.).
+    :type error: Exception
+    :return: The delay in seconds or None if it's not set.
+    :rtype: float | None
+    """
+    headers = getattr(error, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of the provider.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls fail fast for `recovery_time` seconds.
+    Then single trial call is allowed (half-open state): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, recovery_time=30.0):
+        """
+        Initialize CircuitBreaker class.
+
+        :param failure_threshold: Count of consecutive failures to open the circuit.
+        :type failure_threshold: int
+        :param recovery_time: Time to keep circuit open, in seconds.
+        :type recovery_time: float
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.failures = 0
+        self.opened_at = None
+        self.___trial = False
+        self.___lock = threading.Lock()
+
+    @property
+    def state(self):
+        """
+        State of the circuit: 'closed', 'open' or 'half-open'.
+
+        :return: The state.
+        :rtype: str
+        """
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.recovery_time:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """
+        Check whether the call is allowed.
+
+        :return: True if call is allowed.
+        :rtype: bool
+        """
+        with self.___lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.___trial:
+                self.___trial = True
+                return True
+            return False
+
+    def record_success(self):
+        """Record successful call."""
+        with self.___lock:
+            self.failures = 0
+            self.opened_at = None
+            self.___trial = False
+
+    def record_failure(self):
+        """Record failed call."""
+        with self.___lock:
+            self.failures += 1
+            if self.___trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.___trial = False
+
+
+class RetryPolicy:
+    """
+    Retry policy with exponential backoff, full jitter, 'Retry-After' support and per-provider circuit breakers.
+
+    Use `policy.wrap(provider)` as decorator over TimeMetricsWrapperSync/Async (or over any provider call). Count of
+    retries is added to metrics dict as `retries` (and time spent on backoff as `retry_wait`), so it isn't mixed with
+    latency of the successful call.
+    """
+
+    def __init__(
+        self,
+        max_retries=5,
+        base_delay=0.5,
+        max_delay=30.0,
+        retry_on=is_transient_error,
+        failure_threshold=5,
+        recovery_time=30.0,
+        seed=None,
+    ):  # pylint: disable=too-many-arguments
+        """
+        Initialize RetryPolicy class.
+
+        :param max_retries: Max count of retries (attempts - 1).
+        :type max_retries: int
+        :param base_delay: Base delay of backoff, in seconds.
+        :type base_delay: float
+        :param max_delay: Max delay of backoff, in seconds.
+        :type max_delay: float
+        :param retry_on: Exception types which should be retried or predicate getting the error, transient errors
+                         (timeouts, connection errors, 408, 429 and 5xx responses) by default.
+        :type retry_on: tuple | callable
+        :param failure_threshold: Count of consecutive failures to open provider's circuit.
+        :type failure_threshold: int
+        :param recovery_time: Time to keep provider's circuit open, in seconds.
+        :type recovery_time: float
+        :param seed: Seed of jitter random generator.
+        :type seed: int
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.___rng = random.Random(seed)
+        self.___breakers = {}
+        self.___lock = threading.Lock()
+
+    def breaker(self, provider):
+        """
+        Get circuit breaker of the provider.
+
+        :param provider: The name of the provider.
+        :type provider: str
+        :return: The circuit breaker.
+        :rtype: CircuitBreaker
+        """
+        with self.___lock:
+            if provider not in self.___breakers:
+                self.___breakers[provider] = CircuitBreaker(self.failure_threshold, self.recovery_time)
+            return self.___breakers[provider]
+
+    def delay(self, attempt, error=None):
+        """
+        Get delay before the next attempt. 'Retry-After' of the server is the lower bound of the delay.
+
+        :param attempt: Number of failed attempt, starting from 0.
+        :type attempt: int
+        :param error: The error of failed attempt (to get 'Retry-After').
+        :type error: Exception
+        :return: The delay in seconds.
+        :rtype: float
+        """
+        backoff = self.___rng.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        retry_after = get_retry_after(error) if error is not None else None
+        return backoff if retry_after is None else max(retry_after, backoff)
+
+    @staticmethod
+    def __before_call(breaker, provider):
+        """
+        Check circuit before the call.
+
+        :param breaker: The circuit breaker.
+        :type breaker: CircuitBreaker
+        :param provider: The name of the provider.
+        :type provider: str
+        :raises CircuitOpenError: If the circuit is open.
+        """
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit of '{provider}' is open, skipping call")
+
+    def __after_failure(self, breaker, error, attempt):
+        """
+        Record failure and decide whether to retry.
+
+        Only transient errors count as failures of the breaker. Permanent ones (i.e. 400) mean the backend is up and
+        answers, so they are recorded as success (this also finishes trial call of half-open circuit).
+
+        :param breaker: The circuit breaker.
+        :type breaker: CircuitBreaker
+        :param error: The error.
+        :type error: Exception
+        :param attempt: Number of failed attempt, starting from 0.
+        :type attempt: int
+        :return: Delay before retry or None if the error should be raised.
+        :rtype: float | None
+        """
+        if isinstance(self.retry_on, (tuple, type)):
+            retryable = isinstance(error, self.retry_on)
+        else:
+            retryable = self.retry_on(error)
+        if not retryable:
+            breaker.record_success()
+            return None
+        breaker.record_failure()
+        if attempt >= self.max_retries or breaker.state == "open":
+            return None
+        return self.delay(attempt, error)
+
+    @staticmethod
+    def __add_retries(result, retries, retry_wait):
+        """
+        Add count of retries to metrics.
+
+        :param result: The result of the call.
+        :type result: Any
+        :param retries: Count of retries.
+        :type retries: int
+        :param retry_wait: Time spent on backoff, in seconds.
+        :type retry_wait: float
+        :return: The result.
+        :rtype: Any
+        """
+        if isinstance(result, dict):
+            result["retries"] = retries
+            result["retry_wait"] = retry_wait
+        return result
+
+    def wrap(self, provider):
+        """
+        Decorator applying the policy to provider call function (sync or coroutine function).
+
+        :param provider: The name of the provider (circuit breaker key) or function, which gets it from call arguments.
+        :type provider: str | callable
+        :return: The decorator.
+        :rtype: function
+        """
+
+        def get_breaker(args, kwargs):
+            name = provider(*args, **kwargs) if callable(provider) else provider
+            return name, self.breaker(name)
+
+        def decorator(function):
+
+            if is_async_callable(function):
+
+                @functools.wraps(function)
+                async def async_wrapper(*args, **kwargs):
+                    name, breaker = get_breaker(args, kwargs)
+                    retry_wait = 0.0
+                    for attempt in range(self.max_retries + 1):
+                        self.__before_call(breaker, name)
+                        try:
+                            result = await function(*args, **kwargs)
+                        except Exception as error:  # pylint: disable=broad-except
+                            delay = self.__after_failure(breaker, error, attempt)
+                            if delay is None:
+                                raise
+                            retry_wait += delay
+                            await asyncio.sleep(delay)
+                            continue
+                        breaker.record_success()
+                        return self.__add_retries(result, attempt, retry_wait)
+                    return None
+
+                return async_wrapper
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                name, breaker = get_breaker(args, kwargs)
+                retry_wait = 0.0
+                for attempt in range(self.max_retries + 1):
+                    self.__before_call(breaker, name)
+                    try:
+                        result = function(*args, **kwargs)
+                    except Exception as error:  # pylint: disable=broad-except
+                        delay = self.__after_failure(breaker, error, attempt)
+                        if delay is None:
+                            raise
+                        retry_wait += delay
+                        time.sleep(delay)
+                        continue
+                    breaker.record_success()
+                    return self.__add_retries(result, attempt, retry_wait)
+                return None
+
+            return wrapper
+
+        return decorator
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: llm_single_flight.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains single-flight decorators, which coalesce identical in-flight LLM calls into one request.
+"""
+
+import inspect
+import json
+import threading
+from concurrent.futures import Future
+
+import asyncio
+
+
+def make_flight_key(args, kwargs):
+    """
+    Make key of the call by its arguments.
+
+    :param args: Positional arguments of the call.
+    :type args: tuple
+    :param kwargs: Keyword arguments of the call.
+    :type kwargs: dict
+    :return: The key.
+    :rtype: str
+    """
+    return json.dumps([args, kwargs], sort_keys=True, ensure_ascii=False, default=repr)
+
+
+def share_result(result):
+    """
+    Get result for one of waiters: dicts (i.e. metrics of TimeMetricsWrapper) are copied, so waiters may update their
+    own fields (i.e. 'queue_time' or 'retries') without overwriting each other's.
+
+    :param result: The shared result.
+    :type result: Any
+    :return: The result for the waiter.
+    :rtype: Any
+    """
+    return dict(result) if isinstance(result, dict) else result
+
+
+class SingleFlightAsync:
+    """
+    Decorator coalescing concurrent identical calls of coroutine function.
+
+    While a call is in flight, every identical call (same arguments) awaits its result instead of sending a new
+    request. Errors are propagated to all waiters. `__call__` is a coroutine function, so the decorated function is
+    still detected as async one (i.e. by BenchmarkRunner, RateLimiter.limit and RetryPolicy.wrap). Use
+    SingleFlightStream for async generator functions.
+    """
+
+    def __init__(self, function):
+        """
+        Initialize SingleFlightAsync class.
+
+        :param function: The coroutine function.
+        :type function: function
+        :raises TypeError: If function is async generator function.
+        """
+        if inspect.isasyncgenfunction(function):
+            raise TypeError("Async generator functions should be decorated with SingleFlightStream")
+        self.function = function
+        self.___in_flight = {}
+
+    async def __call__(self, *args, **kwargs):
+        """
+        Call the function or join identical call in flight.
+
+        :return: The result of the function.
+        :rtype: Any
+        """
+        key = make_flight_key(args, kwargs)
+        future = self.___in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self.function(*args, **kwargs))
+            self.___in_flight[key] = future
+            future.add_done_callback(
+                lambda done: self.___in_flight.pop(key) if self.___in_flight.get(key) is done else None
+            )
+        return share_result(await asyncio.shield(future))
+
+
+class SingleFlightStream:
+    """
+    Decorator coalescing concurrent identical calls of async generator function.
+
+    While a stream is in flight, every identical call (same arguments) subscribes to it instead of sending a new
+    request. All chunks are fanned out to every waiter, late waiters get already received chunks first. Errors are
+    propagated to all waiters.
+    """
+
+    def __init__(self, function):
+        """
+        Initialize SingleFlightStream class.
+
+        :param function: The async generator function.
+        :type function: function
+        """
+        self.function = function
+        self.___in_flight = {}
+
+    async def __call__(self, *args, **kwargs):
+        """
+        Iterate over chunks of the stream in flight (start it if needed).
+
+        :return: Chunks of the stream.
+        :rtype: AsyncIterator
+        """
+        key = make_flight_key(args, kwargs)
+        broadcast = self.___in_flight.get(key)
+        if broadcast is None:
+            broadcast = {"chunks": [], "done": False, "error": None, "condition": asyncio.Condition()}
+            self.___in_flight[key] = broadcast
+            asyncio.ensure_future(self.__produce(key, broadcast, self.function(*args, **kwargs)))
+        index = 0
+        while True:
+            async with broadcast["condition"]:
+                await broadcast["condition"].wait_for(lambda: index < len(broadcast["chunks"]) or broadcast["done"])
+                chunks = broadcast["chunks"][index:]
+            for chunk in chunks:
+                yield chunk
+            index += len(chunks)
+            if not chunks and broadcast["done"]:
+                if broadcast["error"] is not None:
+                    raise broadcast["error"]
+                return
+
+    async def __produce(self, key, broadcast, stream):
+        """
+        Read the source stream and publish its chunks to all subscribers.
+
+        :param key: The key of the call.
+        :type key: str
+        :param broadcast: The shared state of the stream.
+        :type broadcast: dict
+        :param stream: The source stream.
+        :type stream: AsyncIterator
+        """
+        condition = broadcast["condition"]
+        try:
+            async for chunk in stream:
+                async with condition:
+                    broadcast["chunks"].append(chunk)
+                    condition.notify_all()
+        except Exception as error:  # pylint: disable=broad-except
+            broadcast["error"] = error
+        finally:
+            self.___in_flight.pop(key, None)
+            async with condition:
+                broadcast["done"] = True
+                condition.notify_all()
+
+
+class SingleFlightSync:
+    """
+    Decorator coalescing concurrent (from different threads) identical calls of function or generator function.
+
+    The first caller executes the function, other identical callers wait for its result. For generators, the first
+    caller drives the source and all chunks are fanned out to every waiter. Errors are propagated to all waiters.
+    """
+
+    def __init__(self, function):
+        """
+        Initialize SingleFlightSync class.
+
+        :param function: The function or generator function.
+        :type function: function
+        """
+        self.function = function
+        self.___in_flight = {}
+        self.___lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        """
+        Call the function or join identical call in flight.
+
+        :return: The result (for function) or iterator (for generator function).
+        :rtype: Any | Iterator
+        """
+        key = make_flight_key(args, kwargs)
+        if inspect.isgeneratorfunction(self.function):
+            return self.__subscribe(key, args, kwargs)
+        with self.___lock:
+            future = self.___in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.___in_flight[key] = future
+        if not leader:
+            return share_result(future.result())
+        try:
+            future.set_result(self.function(*args, **kwargs))
+        except Exception as error:  # pylint: disable=broad-except
+            future.set_exception(error)
+        finally:
+            with self.___lock:
+                self.___in_flight.pop(key, None)
+        return share_result(future.result())
+
+    def __subscribe(self, key, args, kwargs):
+        """
+        Iterate over chunks of the stream in flight (drive it, if this is the first caller).
+
+        :param key: The key of the call.
+        :type key: str
+        :param args: Positional arguments of the call.
+        :type args: tuple
+        :param kwargs: Keyword arguments of the call.
+        :type kwargs: dict
+        :return: Chunks of the stream.
+        :rtype: Iterator
+        """
+        with self.___lock:
+            broadcast = self.___in_flight.get(key)
+            leader = broadcast is None
+            if leader:
+                broadcast = {"chunks": [], "done": False, "error": None, "condition": threading.Condition()}
+                self.___in_flight[key] = broadcast
+        if leader:
+            yield from self.__produce(key, broadcast, self.function(*args, **kwargs))
+            return
+        condition = broadcast["condition"]
+        index = 0
+        while True:
+            with condition:
+                condition.wait_for(lambda: index < len(broadcast["chunks"]) or broadcast["done"])
+                chunks = broadcast["chunks"][index:]
+            yield from chunks
+            index += len(chunks)
+            if not chunks and broadcast["done"]:
+                if broadcast["error"] is not None:
+                    raise broadcast["error"]
+                return
+
+    def __produce(self, key, broadcast, stream):
+        """
+        Read the source stream, publish its chunks and yield them to the leader.
+
+        If the leader stops iterating early, the rest of the stream is still read for other waiters.
+
+        :param key: The key of the call.
+        :type key: str
+        :param broadcast: The shared state of the stream.
+        :type broadcast: dict
+        :param stream: The source stream.
+        :type stream: Iterator
+        """
+        condition = broadcast["condition"]
+
+        def publish(chunk):
+            with condition:
+                broadcast["chunks"].append(chunk)
+                condition.notify_all()
+
+        try:
+            for chunk in stream:
+                publish(chunk)
+                yield chunk
+        except GeneratorExit:
+            try:
+                for chunk in stream:
+                    publish(chunk)
+            except Exception as error:  # pylint: disable=broad-except
+                broadcast["error"] = error
+            raise
+        except Exception as error:
+            broadcast["error"] = error
+            raise
+        finally:
+            with self.___lock:
+                self.___in_flight.pop(key, None)
+            with condition:
+                broadcast["done"] = True
+                condition.notify_all()
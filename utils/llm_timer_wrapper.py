@@ -5,26 +5,67 @@ Author: Iliya Vereshchagin
 Copyright (c) 2023. All rights reserved.
 
 Created: 21.11.2023
-Last Modified: 21.11.2023
+Last Modified: 18.10.2026
 
 Description:
 This file contains the decorator for measuring time metrics of function execution.
 """
 
+import statistics
 import time
 
+from utils.llm_tokenizers import count_tokens
+
+
+def calculate_metrics(elapsed_time, result, model=None):
+    """
+    Calculate basic time metrics for the result of the function.
+
+    :param elapsed_time: The time it took to get the result, in seconds.
+    :type elapsed_time: float
+    :param result: The result of the function.
+    :type result: str
+    :param model: The model used to pick the tokenizer. If not set (or unknown), tokens are estimated.
+    :type model: str
+    :return: The metrics of the function.
+    :rtype: dict
+    """
+    words = len(result.split())
+    chars = len(result)
+    tokens = count_tokens(result, model)
+
+    word_speed = elapsed_time / words if words else 0
+    char_speed = elapsed_time / chars if chars else 0
+    token_speed = elapsed_time / tokens if tokens else 0
+
+    metrix = {
+        "elapsed_time": elapsed_time,
+        "words": words,
+        "chars": chars,
+        "tokens": tokens,
+        "word_speed": word_speed,
+        "char_speed": char_speed,
+        "token_speed": token_speed,
+        "results": result,
+    }
+
+    return metrix
+
 
 class TimeMetricsWrapperSync:
     """Decorator for measuring time metrics of function execution"""
 
-    def __init__(self, function):
+    def __init__(self, function, tokenizer_model=None):
         """
         Initialize TimeMetricsWrapper class.
 
         :param function: The function to measure.
         :type function: function
+        :param tokenizer_model: The model used to count tokens, i.e. 'gpt-4'. Use functools.partial to decorate.
+        :type tokenizer_model: str
         """
         self.function = function
+        self.tokenizer_model = tokenizer_model
 
     def __call__(self, prompt, model=None):
         """
@@ -37,47 +78,35 @@ class TimeMetricsWrapperSync:
         :return: The metrics of the function.
         :rtype: dict
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         if model:
             result = self.function(prompt, model)
         else:
             result = self.function(prompt)
-        end_time = time.time()
-
-        elapsed_time = end_time - start_time
-        words = len(result.split())
-        chars = len(result)
-        tokens = len(result) // 3
-
-        word_speed = elapsed_time / words if words else 0
-        char_speed = elapsed_time / chars if chars else 0
-        token_speed = elapsed_time / tokens if tokens else 0
-
-        metrix = {
-            "elapsed_time": elapsed_time,
-            "words": words,
-            "chars": chars,
-            "tokens": tokens,
-            "word_speed": word_speed,
-            "char_speed": char_speed,
-            "token_speed": token_speed,
-            "results": result,
-        }
+        end_time = time.perf_counter()
 
-        return metrix
+        return calculate_metrics(end_time - start_time, result, model or self.tokenizer_model)
 
 
 class TimeMetricsWrapperAsync:
-    """Decorator for measuring time metrics of function execution"""
+    """
+    Decorator for measuring time metrics of function execution.
+
+    Wrapped function may be a coroutine function (the whole response is awaited) or an async generator function
+    (response is streamed by chunks). For streamed responses time-to-first-token and inter-chunk gaps are measured too.
+    """
 
-    def __init__(self, function):
+    def __init__(self, function, tokenizer_model=None):
         """
         Initialize TimeMetricsWrapper class.
 
         :param function: The function to measure.
         :type function: function
+        :param tokenizer_model: The model used to count tokens, i.e. 'gpt-4'. Use functools.partial to decorate.
+        :type tokenizer_model: str
         """
         self.function = function
+        self.tokenizer_model = tokenizer_model
 
     async def __call__(self, prompt):
         """
@@ -88,28 +117,43 @@ class TimeMetricsWrapperAsync:
         :return: The metrics of the function.
         :rtype: dict
         """
-        start_time = time.time()
-        result = await self.function(prompt)
-        end_time = time.time()
+        start_time = time.perf_counter()
+        response = self.function(prompt)
+        if hasattr(response, "__aiter__"):
+            return await self.measure_stream(response, start_time)
+        result = await response
+        end_time = time.perf_counter()
+
+        return calculate_metrics(end_time - start_time, result, self.tokenizer_model)
+
+    async def measure_stream(self, stream, start_time):
+        """
+        Consume the stream and measure streaming metrics.
+
+        :param stream: The async iterator with response chunks.
+        :type stream: AsyncIterator[str]
+        :param start_time: The time (perf_counter) when request was sent.
+        :type start_time: float
+        :return: The metrics of the function, including streaming metrics.
+        :rtype: dict
+        """
+        chunks = []
+        arrivals = []
+        async for chunk in stream:
+            arrivals.append(time.perf_counter())
+            chunks.append(chunk)
+        end_time = time.perf_counter()
 
         elapsed_time = end_time - start_time
-        words = len(result.split())
-        chars = len(result)
-        tokens = len(result) // 3
-
-        word_speed = elapsed_time / words if words else 0
-        char_speed = elapsed_time / chars if chars else 0
-        token_speed = elapsed_time / tokens if tokens else 0
-
-        metrix = {
-            "elapsed_time": elapsed_time,
-            "words": words,
-            "chars": chars,
-            "tokens": tokens,
-            "word_speed": word_speed,
-            "char_speed": char_speed,
-            "token_speed": token_speed,
-            "results": result,
-        }
+        metrix = calculate_metrics(elapsed_time, "".join(chunks), self.tokenizer_model)
+        gaps = [current - previous for previous, current in zip(arrivals, arrivals[1:])]
+
+        metrix["ttft"] = arrivals[0] - start_time if arrivals else elapsed_time
+        metrix["chunks"] = len(chunks)
+        metrix["chunk_gaps"] = gaps
+        metrix["mean_chunk_gap"] = statistics.fmean(gaps) if gaps else 0
+        metrix["median_chunk_gap"] = statistics.median(gaps) if gaps else 0
+        metrix["max_chunk_gap"] = max(gaps) if gaps else 0
+        metrix["tokens_per_second"] = metrix["tokens"] / elapsed_time if elapsed_time else 0
 
         return metrix
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: llm_tokenizers.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains registry of tokenizers used for counting tokens of LLM responses.
+"""
+
+import threading
+from functools import lru_cache
+
+
+def heuristic_token_count(text):
+    """
+    Estimate count of tokens in the text (roughly 3 chars per token).
+
+    :param text: The text to count tokens in.
+    :type text: str
+    :return: Estimated count of tokens.
+    :rtype: int
+    """
+    return len(text) // 3
+
+
+def tiktoken_loader(encoding_name):
+    """
+    Create loader for tiktoken encoding.
+
+    :param encoding_name: The name of tiktoken encoding, i.e. 'cl100k_base'.
+    :type encoding_name: str
+    :return: Loader, which returns token counting function or None if tiktoken is not available.
+    :rtype: function
+    """
+
+    def loader():
+        try:
+            import tiktoken  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            return None
+        try:
+            encoding = tiktoken.get_encoding(encoding_name)
+        except Exception:  # pylint: disable=broad-except
+            return None
+        return lambda text: len(encoding.encode_ordinary(text))
+
+    return loader
+
+
+class TokenizerRegistry:
+    """
+    Registry of tokenizers keyed by model family.
+
+    Tokenizers are loaded lazily, only once per process, and token counts of repeated texts are cached.
+    If there is no tokenizer for the model family (or it can't be loaded), heuristic count is used.
+    """
+
+    def __init__(self, cache_size=4096):
+        """
+        Initialize TokenizerRegistry class.
+
+        :param cache_size: Max count of cached token counts.
+        :type cache_size: int
+        """
+        self.___loaders = {}
+        self.___prefixes = []
+        self.___tokenizers = {}
+        self.___lock = threading.Lock()
+        self.___cached_count = lru_cache(maxsize=cache_size)(self.__count)
+
+    def register(self, family, loader, prefixes=()):
+        """
+        Register tokenizer loader for model family.
+
+        :param family: The name of model family.
+        :type family: str
+        :param loader: Function without arguments, which returns token counting function (or None).
+        :type loader: function
+        :param prefixes: Model name prefixes, which belong to the family.
+        :type prefixes: tuple[str]
+        """
+        with self.___lock:
+            self.___loaders[family] = loader
+            self.___tokenizers.pop(family, None)
+            self.___prefixes = [item for item in self.___prefixes if item[1] != family]
+            self.___prefixes.extend((prefix.lower(), family) for prefix in (family, *prefixes))
+            self.___prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+        self.___cached_count.cache_clear()
+
+    def resolve_family(self, model):
+        """
+        Get model family by model name (longest registered prefix wins).
+
+        :param model: The name of the model.
+        :type model: str
+        :return: The name of model family or None if model is unknown.
+        :rtype: str | None
+        """
+        if not model:
+            return None
+        model = model.lower()
+        for prefix, family in self.___prefixes:
+            if model.startswith(prefix):
+                return family
+        return None
+
+    def get_tokenizer(self, family):
+        """
+        Get (and load at first call) token counting function for the model family.
+
+        :param family: The name of model family.
+        :type family: str
+        :return: Token counting function or None if tokenizer isn't available.
+        :rtype: function | None
+        """
+        if family in self.___tokenizers:
+            return self.___tokenizers[family]
+        with self.___lock:
+            if family not in self.___tokenizers:
+                loader = self.___loaders.get(family)
+                self.___tokenizers[family] = loader() if loader else None
+            return self.___tokenizers[family]
+
+    def count_tokens(self, text, model=None):
+        """
+        Count tokens in the text using tokenizer of the model family.
+
+        :param text: The text to count tokens in.
+        :type text: str
+        :param model: The name of the model.
+        :type model: str
+        :return: Count of tokens.
+        :rtype: int
+        """
+        if not text:
+            return 0
+        return self.___cached_count(self.resolve_family(model), text)
+
+    def __count(self, family, text):
+        """
+        Count tokens using the tokenizer of the family or heuristic.
+
+        :param family: The name of model family.
+        :type family: str | None
+        :param text: The text to count tokens in.
+        :type text: str
+        :return: Count of tokens.
+        :rtype: int
+        """
+        tokenizer = self.get_tokenizer(family) if family else None
+        if tokenizer is None:
+            return heuristic_token_count(text)
+        return tokenizer(text)
+
+
+tokenizer_registry = TokenizerRegistry()
+tokenizer_registry.register("gpt-4o", tiktoken_loader("o200k_base"), prefixes=("gpt-4.1", "gpt-5", "o1", "o3", "o4"))
+tokenizer_registry.register("gpt-4", tiktoken_loader("cl100k_base"), prefixes=("gpt-3.5", "text-embedding-3"))
+
+
+def count_tokens(text, model=None):
+    """
+    Count tokens in the text using default tokenizer registry.
+
+    :param text: The text to count tokens in.
+    :type text: str
+    :param model: The name of the model.
+    :type model: str
+    :return: Count of tokens.
+    :rtype: int
+    """
+    return tokenizer_registry.count_tokens(text, model)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: network_idle.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains network-idle detection for Chrome, driven by DevTools Protocol network events of performance log.
+"""
+
+import json
+import time
+
+PERFORMANCE_LOGGING_PREFS = {"performance": "ALL"}
+REQUEST_STARTED = "Network.requestWillBeSent"
+REQUEST_FINISHED = ("Network.loadingFinished", "Network.loadingFailed")
+# Fallback for drivers without performance log: counter of pending fetch/XHR requests, injected into every document
+# by `install_request_tracker` (Resource Timing can't be used, its entries appear only after requests are finished)
+REQUEST_TRACKER_SCRIPT = """
+(() => {
+  if (window.__pendingRequests !== undefined) return;
+  window.__pendingRequests = 0;
+  const done = () => { window.__pendingRequests = Math.max(0, window.__pendingRequests - 1); };
+  if (window.fetch) {
+    const originalFetch = window.fetch;
+    window.fetch = function (...args) {
+      window.__pendingRequests += 1;
+      return originalFetch.apply(this, args).finally(done);
+    };
+  }
+  const originalSend = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function (...args) {
+    window.__pendingRequests += 1;
+    this.addEventListener("loadend", done, { once: true });
+    return originalSend.apply(this, args);
+  };
+})();
+"""
+PENDING_REQUESTS_SCRIPT = "return window.__pendingRequests === undefined ? null : window.__pendingRequests"
+
+
+def enable_network_events(options):
+    """
+    Enable performance log with DevTools Protocol network events in Chrome options.
+
+    :param options: (selenium.webdriver.chrome.options.Options) Chrome options.
+    :return: (selenium.webdriver.chrome.options.Options) The options.
+    """
+    options.set_capability("goog:loggingPrefs", PERFORMANCE_LOGGING_PREFS)
+    return options
+
+
+def install_request_tracker(driver):
+    """
+    Inject counter of pending fetch/XHR requests into every new document (DevTools Protocol), used when performance
+    log isn't available.
+
+    :param driver: (webdriver.Chrome) The driver.
+    :return: (bool) True if the counter is installed.
+    """
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": REQUEST_TRACKER_SCRIPT})
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return True
+
+
+def read_network_events(driver):
+    """
+    Read (and drain) DevTools Protocol network events from performance log.
+
+    :param driver: (webdriver.Chrome) The driver.
+    :return: (list) List of (method, request_id) tuples or None if performance log isn't available.
+    """
+    try:
+        entries = driver.get_log("performance")
+    except Exception:  # pylint: disable=broad-except
+        return None
+    events = []
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, TypeError, ValueError):
+            continue
+        method = message.get("method", "")
+        if method == REQUEST_STARTED or method in REQUEST_FINISHED:
+            events.append((method, message.get("params", {}).get("requestId")))
+    return events
+
+
+def wait_for_network_idle(driver, quiet_window=0.5, max_wait=30.0, poll_interval=0.05, max_inflight=0):
+    """
+    Wait until there are no more than `max_inflight` requests in flight for `quiet_window` seconds.
+
+    Requests are tracked by network events of performance log (see `enable_network_events`); call
+    `read_network_events` before navigation to drop events of previous pages. If the log isn't available, counter of
+    pending fetch/XHR requests is polled instead (see `install_request_tracker`). Without both, network can't be
+    observed and the wait is a fixed delay of `quiet_window` ('source' is 'fixed_delay').
+
+    :param driver: (webdriver.Chrome) The driver.
+    :param quiet_window: (float) Time without network activity to consider the page idle, in seconds.
+    :param max_wait: (float) Max time to wait, in seconds.
+    :param poll_interval: (float) Interval between polls, in seconds.
+    :param max_inflight: (int) Count of requests allowed to stay in flight (i.e. long polling).
+    :return: (dict) 'waited' time in seconds, 'idle' flag (False on timeout), count of 'requests' and 'source'
+             ('cdp', 'request_tracker' or 'fixed_delay').
+    """
+    start_time = time.perf_counter()
+    inflight = set()
+    requests = 0
+    source = "cdp"
+    quiet_since = start_time
+    while True:
+        now = time.perf_counter()
+        events = read_network_events(driver) if source == "cdp" else None
+        if events is None:
+            try:
+                pending = driver.execute_script(PENDING_REQUESTS_SCRIPT) if source != "fixed_delay" else None
+            except Exception:  # pylint: disable=broad-except
+                pending = None
+            source = "request_tracker" if pending is not None else "fixed_delay"
+            busy = pending is not None and pending > max_inflight
+        else:
+            for method, request_id in events:
+                if method == REQUEST_STARTED:
+                    inflight.add(request_id)
+                    requests += 1
+                else:
+                    inflight.discard(request_id)
+            busy = bool(events) or len(inflight) > max_inflight
+        if busy:
+            quiet_since = now
+        elif now - quiet_since >= quiet_window:
+            return {"waited": now - start_time, "idle": True, "requests": requests, "source": source}
+        if now - start_time >= max_wait:
+            return {"waited": now - start_time, "idle": False, "requests": requests, "source": source}
+        time.sleep(poll_interval)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: page_cache.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains disk cache (SQLite) of fetched and cleaned web pages with HTTP revalidation and offline mode.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+
+class PageCacheMiss(LookupError):
+    """Raised in offline mode when the page isn't cached."""
+
+
+class PageCache:
+    """
+    The PageCache class keeps raw and cleaned HTML of pages on disk.
+
+    Entries are keyed by (URL, render mode, kind). Entries younger than `ttl` are served as is; older ones are served
+    after revalidation (ETag / Last-Modified) when the origin supports it, otherwise fetched again. The least recently
+    used entries are evicted when the total size exceeds the limit. In `offline` mode pages are only read from the
+    cache (regardless of age), so runs are reproducible and never touch the network.
+    """
+
+    def __init__(self, path="page_cache.sqlite", max_size=200 * 1024 * 1024, ttl=24 * 3600, offline=None):
+        """
+        General init.
+
+        :param path: (str) Path to SQLite file.
+        :param max_size: (int) Max total size of cached pages, in bytes.
+        :param ttl: (float) Time after which entry should be revalidated, in seconds.
+        :param offline: (bool) Cache-only mode, PAGE_CACHE_OFFLINE=1 environment variable by default.
+        """
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.offline = os.environ.get("PAGE_CACHE_OFFLINE") == "1" if offline is None else offline
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0}
+        self.___lock = threading.Lock()
+        self.___connection = None
+
+    def __connect(self):
+        """
+        Get connection to the database, it's opened (and the file is created) on first use. Should be called under
+        the lock.
+
+        :return: (sqlite3.Connection) The connection.
+        """
+        if self.___connection is None:
+            self.___connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.___connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT NOT NULL, mode TEXT NOT NULL, kind TEXT NOT NULL, content TEXT NOT NULL, "
+                "etag TEXT, last_modified TEXT, size INTEGER NOT NULL, validated_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL, PRIMARY KEY (url, mode, kind))"
+            )
+            self.___connection.execute("CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)")
+            self.___connection.commit()
+        return self.___connection
+
+    def get(self, url, mode, kind="raw"):
+        """
+        Get cached page.
+
+        :param url: (str) URL of the page.
+        :param mode: (str) Render mode (fetch mode of PageRetriever).
+        :param kind: (str) Kind of content, i.e. 'raw' or 'clean'.
+        :return: (dict) Entry with 'content', 'etag', 'last_modified' and 'fresh' flag, or None.
+        """
+        now = time.time()
+        with self.___lock:
+            connection = self.__connect()
+            row = connection.execute(
+                "SELECT content, etag, last_modified, validated_at FROM pages WHERE url = ? AND mode = ? AND kind = ?",
+                (url, mode, kind),
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            connection.execute(
+                "UPDATE pages SET accessed_at = ? WHERE url = ? AND mode = ? AND kind = ?", (now, url, mode, kind)
+            )
+            connection.commit()
+        return {
+            "content": row[0],
+            "etag": row[1],
+            "last_modified": row[2],
+            "fresh": self.ttl is None or now - row[3] <= self.ttl,
+        }
+
+    def set(self, url, mode, content, kind="raw", etag=None, last_modified=None):
+        """
+        Store page in the cache and evict least recently used entries if needed.
+
+        :param url: (str) URL of the page.
+        :param mode: (str) Render mode (fetch mode of PageRetriever).
+        :param content: (str) The content.
+        :param kind: (str) Kind of content, i.e. 'raw' or 'clean'.
+        :param etag: (str) ETag of the page.
+        :param last_modified: (str) Last-Modified of the page.
+        """
+        now = time.time()
+        with self.___lock:
+            connection = self.__connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO pages (url, mode, kind, content, etag, last_modified, size, validated_at, "
+                "accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, mode, kind, content, etag, last_modified, len(content.encode("utf-8")), now, now),
+            )
+            self.__evict()
+            connection.commit()
+
+    def touch(self, url, mode, kind="raw"):
+        """
+        Mark entry as validated now (i.e. after '304 Not Modified').
+
+        :param url: (str) URL of the page.
+        :param mode: (str) Render mode (fetch mode of PageRetriever).
+        :param kind: (str) Kind of content, i.e. 'raw' or 'clean'.
+        """
+        with self.___lock:
+            connection = self.__connect()
+            connection.execute(
+                "UPDATE pages SET validated_at = ? WHERE url = ? AND mode = ? AND kind = ?",
+                (time.time(), url, mode, kind),
+            )
+            connection.commit()
+            self.stats["revalidated"] += 1
+
+    def record_hit(self):
+        """Count cache hit."""
+        with self.___lock:
+            self.stats["hits"] += 1
+
+    def __evict(self):
+        """Delete least recently used entries above the size limit. Should be called under the lock."""
+        total_size = self.___connection.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total_size <= self.max_size:
+            return
+        stale_keys = []
+        for url, mode, kind, size in self.___connection.execute(
+            "SELECT url, mode, kind, size FROM pages ORDER BY accessed_at"
+        ):
+            if total_size <= self.max_size:
+                break
+            stale_keys.append((url, mode, kind))
+            total_size -= size
+        self.___connection.executemany("DELETE FROM pages WHERE url = ? AND mode = ? AND kind = ?", stale_keys)
+
+    def clear(self):
+        """Delete all entries."""
+        with self.___lock:
+            connection = self.__connect()
+            connection.execute("DELETE FROM pages")
+            connection.commit()
+
+    def close(self):
+        """Close the database."""
+        with self.___lock:
+            if self.___connection is not None:
+                self.___connection.close()
+                self.___connection = None
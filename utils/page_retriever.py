@@ -5,39 +5,123 @@ Author: Iliya Vereshchagin
 Copyright (c) 2023. All rights reserved.
 
 Created: 30.09.2023
-Last Modified: 17.10.2023
+Last Modified: 18.10.2026
 
 Description:
 This module contains implementation for PageRetriever
 """
+import hashlib
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import asyncio
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
+
+from .dom_chunker import iter_dom_chunks
+from .dom_distiller import distill_html
+from .html_cleaner import clean_html
+from .http_fetcher import HttpFetcher
+from .page_cache import PageCacheMiss
+from .network_idle import read_network_events, wait_for_network_idle
+from .webdriver_pool import WebDriverPool
 
 
 class PageRetriever:
-    """The PageRetriever class is for managing an instance of the PageRetriever."""
+    """
+    The PageRetriever class is for managing an instance of the PageRetriever.
+
+    Pages are rendered by warm Chrome sessions of the pool, which is created lazily on the first fetch (or shared
+    between retrievers via `pool`), so the retriever may be reused for many pages. Call `close` when done.
+
+    Fetch modes: 'browser' always renders the page, 'http' only fetches it by plain HTTP GET, 'auto' tries HTTP first
+    and falls back to the browser when the page looks like it needs JavaScript (see `http_fetcher.needs_javascript`).
+
+    With `cache` (PageCache) raw and cleaned pages are kept on disk per URL and fetch mode, revalidated by ETag /
+    Last-Modified after TTL, and in offline mode of the cache pages are never fetched.
+    """
+
+    FETCH_MODES = ("browser", "http", "auto")
 
-    def __init__(self, url=""):
+    def __init__(
+        self, url="", pool=None, quiet_window=0.5, max_wait=30.0, fetch_mode="browser", http_fetcher=None, cache=None
+    ):  # pylint: disable=too-many-arguments
         """
         General init.
 
         :param url: (str) URL of the page.
+        :param pool: (WebDriverPool) Shared pool of browser sessions, own single-session pool by default.
+        :param quiet_window: (float) Time without network activity to consider the page loaded, in seconds.
+        :param max_wait: (float) Max time to wait for network idle, in seconds.
+        :param fetch_mode: (str) 'browser', 'http' or 'auto'.
+        :param http_fetcher: (HttpFetcher) Shared HTTP fetcher, own one by default.
+        :param cache: (PageCache) Disk cache of pages, pages aren't cached by default.
         """
-        options = Options()
-        options.add_argument("--headless")
-        options.headless = True
-        path = ChromeDriverManager().install()
-        self.driver = webdriver.Chrome(service=ChromeService(executable_path=path), options=options)
+        if fetch_mode not in self.FETCH_MODES:
+            raise ValueError(f"Unknown fetch mode '{fetch_mode}', expected one of {self.FETCH_MODES}")
         self.url = url
+        self.quiet_window = quiet_window
+        self.max_wait = max_wait
+        self.fetch_mode = fetch_mode
+        self.cache = cache
+        self.last_fetch = {}
+        self.last_distillation = {}
+        self.___own_pool = pool is None
+        self.___pool = pool
+        self.___own_http_fetcher = http_fetcher is None
+        self.___http_fetcher = http_fetcher
+
+    @property
+    def pool(self):
+        """
+        Pool of browser sessions (created on first access).
+
+        :return: (WebDriverPool) The pool.
+        """
+        if self.___pool is None:
+            self.___pool = WebDriverPool(size=1)
+        return self.___pool
+
+    @property
+    def http_fetcher(self):
+        """
+        HTTP fetcher with pooled connections (created on first access).
+
+        :return: (HttpFetcher) The fetcher.
+        """
+        if self.___http_fetcher is None:
+            self.___http_fetcher = HttpFetcher()
+        return self.___http_fetcher
+
+    def close(self):
+        """Quit browser sessions of own pool and close own HTTP connections (shared ones are closed by owners)."""
+        if self.___own_pool and self.___pool is not None:
+            self.___pool.close()
+            self.___pool = None
+        if self.___own_http_fetcher and self.___http_fetcher is not None:
+            self.___http_fetcher.close()
+            self.___http_fetcher = None
+
+    def __enter__(self):
+        """
+        Enter the context.
+
+        :return: (PageRetriever) The retriever.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Exit the context, closing the retriever.
+
+        :param exc_type: The exception type.
+        :param exc_value: The exception.
+        :param traceback: The traceback.
+        """
+        self.close()
 
     def set_url(self, url):
         """
@@ -73,38 +157,259 @@ class PageRetriever:
         """
         Get the body content of the page without <script>...</script> tags.
 
+        Styles, svg, comments and hidden nodes are stripped too, in a single pass (see `html_cleaner.clean_html`).
+
         :param url: (str) URL of the page.
         :return: (str) Body content of the page without <script>...</script> tags.
         """
         if url:
             self.set_url(url)
-        return self.remove_script_tags(self.get_body())
+        return self.__clean(self.url, self.get_page())
+
+    def __clean(self, url, content):
+        """
+        Clean the page content, reusing cleaned content from the cache (keyed by digest of the raw content).
+
+        :param url: (str) URL of the page.
+        :param content: (str) HTML content of the page.
+        :return: (str) Cleaned body of the page.
+        """
+        if self.cache is None:
+            return clean_html(content)
+        kind = "clean:" + hashlib.sha1(content.encode("utf-8")).hexdigest()
+        entry = self.cache.get(url, self.fetch_mode, kind)
+        if entry is not None:
+            return entry["content"]
+        cleaned = clean_html(content)
+        self.cache.set(url, self.fetch_mode, cleaned, kind)
+        return cleaned
+
+    def iter_body_chunks(self, url=None, max_tokens=3000, model=None):
+        """
+        Get the body content of the page without scripts (like `get_body_without_scripts`), split into chunks of at
+        most `max_tokens` tokens along element boundaries. Every chunk is wrapped into tags of its ancestors.
+
+        :param url: (str) URL of the page.
+        :param max_tokens: (int) Max count of tokens of the chunk.
+        :param model: (str) Model, which tokenizer is used to count tokens.
+        :return: (Generator[dict]) Chunks with 'index', 'path' (i.e. 'body > div#main'), 'content' and 'tokens'.
+        """
+        return iter_dom_chunks(self.get_body_without_scripts(url), max_tokens, model)
+
+    def get_page_elements(self, url=None, token_budget=2000, model=None):
+        """
+        Get interactive and semantic elements of the page (inputs, buttons, links, labels, headings) with short XPaths
+        and visible text, fitting into the token budget. Compression ratio is reported in `last_distillation`.
+
+        :param url: (str) URL of the page.
+        :param token_budget: (int) Max count of tokens of the result.
+        :param model: (str) Model, which tokenizer is used to count tokens.
+        :return: (str) Distilled page, one element per line.
+        """
+        if url:
+            self.set_url(url)
+        report = distill_html(self.get_page(), token_budget, model)
+        self.last_distillation = {key: value for key, value in report.items() if key != "content"}
+        return report["content"]
+
+    def __fetch_result(self, url, clean):
+        """
+        Fetch the page for batch fetching, catching errors.
+
+        :param url: (str) URL of the page.
+        :param clean: (bool) Return cleaned body instead of the whole page.
+        :return: (dict) Report of `fetch_page` with 'error' (None on success).
+        """
+        start_time = time.perf_counter()
+        try:
+            report = self.fetch_page(url)
+            if clean:
+                report["content"] = self.__clean(url, report["content"])
+            report["error"] = None
+        except Exception as error:  # pylint: disable=broad-except
+            report = {"url": url, "content": None, "mode": None, "error": error}
+        report["latency"] = time.perf_counter() - start_time
+        return report
+
+    def __prepare_pool(self, concurrency):
+        """
+        Create own pool big enough for the batch, if it isn't created yet, and get count of workers of the batch.
+
+        In 'browser' mode every fetch needs a session, so workers are capped by size of the pool. In 'auto' mode pages
+        falling back to the browser wait for a free session (up to `checkout_timeout` of the pool).
+
+        :param concurrency: (int) Count of concurrent fetches.
+        :return: (int) Count of workers.
+        """
+        if self.___own_pool and self.___pool is None and self.fetch_mode != "http":
+            self.___pool = WebDriverPool(size=concurrency)
+        if self.fetch_mode == "browser":
+            return max(1, min(concurrency, self.pool.size))
+        return concurrency
+
+    def get_pages(self, urls, concurrency=4, clean=True):
+        """
+        Fetch pages concurrently, yielding results as they complete.
+
+        Fetches are spread across pooled browser sessions and HTTP connections; failure of one URL doesn't abort the
+        batch, it's reported in 'error' of its result. If iteration is stopped early, fetches which haven't started
+        yet are cancelled.
+
+        :param urls: (list) URLs of the pages.
+        :param concurrency: (int) Max count of concurrent fetches (in 'browser' mode capped by size of the pool).
+        :param clean: (bool) Return cleaned bodies (like `get_body_without_scripts`) instead of whole pages.
+        :return: (Generator[dict]) Reports with 'url', 'content', 'mode', 'latency' and 'error'.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.__prepare_pool(concurrency))
+        try:
+            futures = [executor.submit(self.__fetch_result, url, clean) for url in urls]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def get_pages_async(self, urls, concurrency=4, clean=True):
+        """
+        Fetch pages concurrently without blocking the event loop, yielding results as they complete.
+
+        :param urls: (list) URLs of the pages.
+        :param concurrency: (int) Max count of concurrent fetches (in 'browser' mode capped by size of the pool).
+        :param clean: (bool) Return cleaned bodies (like `get_body_without_scripts`) instead of whole pages.
+        :return: (AsyncGenerator[dict]) Reports with 'url', 'content', 'mode', 'latency' and 'error'.
+        """
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.__prepare_pool(concurrency))
+        tasks = []
+        try:
+            tasks = [loop.run_in_executor(executor, self.__fetch_result, url, clean) for url in urls]
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            # doesn't wait for running fetches, so the event loop isn't blocked
+            executor.shutdown(wait=False, cancel_futures=True)
+            for task in tasks:
+                task.cancel()
 
     def get_page_content(self, url):
         """
         Get the page content from the url.
 
+        Path chosen by `fetch_mode` and timings of the fetch are reported in `last_fetch`.
+
         :param url: (str) URL of the page.
         :return: (str) HTML content of the page.
         """
-        self.driver.get(url)
+        report = self.fetch_page(url)
+        self.last_fetch = {key: value for key, value in report.items() if key != "content"}
+        return report["content"]
+
+    def fetch_page(self, url):
+        """
+        Fetch the page according to `fetch_mode`, using the cache if it's set.
+
+        :param url: (str) URL of the page.
+        :return: (dict) Report with 'url', 'content', 'mode' ('http', 'browser' or 'cache'), 'latency' in seconds,
+                 'fallback_reason' (why HTTP result wasn't used) and network wait of the browser path.
+        :raises ValueError: If the page can't be used without browser in 'http' mode.
+        :raises PageCacheMiss: If the page isn't cached in offline mode.
+        """
+        start_time = time.perf_counter()
+        if self.cache is None:
+            report = self.__fetch_page(url, start_time)
+            report.pop("validators")
+            return report
+        entry = self.cache.get(url, self.fetch_mode)
+        response = None
+        if entry is not None:
+            revalidated = not entry["fresh"] and not self.cache.offline
+            if revalidated:
+                response = self.http_fetcher.revalidate(url, entry["etag"], entry["last_modified"])
+                if response is not None and response.status_code == 304:
+                    self.cache.touch(url, self.fetch_mode)
+                else:
+                    entry = None
+            else:
+                self.cache.record_hit()
+        if entry is not None:
+            return {
+                "url": url,
+                "content": entry["content"],
+                "mode": "cache",
+                "latency": time.perf_counter() - start_time,
+                "fallback_reason": None,
+                "revalidated": revalidated,
+            }
+        if self.cache.offline:
+            raise PageCacheMiss(f"Page '{url}' ({self.fetch_mode}) isn't cached, can't fetch it in offline mode")
+        # if the page was modified, response of the conditional GET is already the new page
+        report = self.__fetch_page(url, start_time, response)
+        self.cache.set(url, self.fetch_mode, report["content"], **report.pop("validators"))
+        return report
+
+    def __fetch_page(self, url, start_time, response=None):
+        """
+        Fetch the page according to `fetch_mode`, without cache.
 
-        WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+        Validators of rendered pages are taken from the HTTP attempt of 'auto' mode, in 'browser' mode there are none
+        (such pages are rendered again when they expire in the cache).
 
-        start_time = time.time()
-        while True:
-            network_activity = self.driver.execute_script(
-                "return window.performance.getEntriesByType('resource').filter(item => "
-                "item.initiatorType == 'xmlhttprequest' && item.duration == 0)"
-            )
-            if not network_activity or time.time() - start_time > 30:
-                break
+        :param url: (str) URL of the page.
+        :param start_time: (float) Start time of the fetch (perf_counter).
+        :param response: (requests.Response) Already received response of the page, it's used instead of HTTP GET.
+        :return: (dict) Report of `fetch_page` with 'validators' of HTTP response (for the cache).
+        """
+        fallback_reason = None
+        validators = {}
+        if self.fetch_mode != "browser":
+            if response is not None:
+                content, fallback_reason, validators = self.http_fetcher.check_response(response)
+            else:
+                content, fallback_reason, validators = self.http_fetcher.fetch(url)
+            if content is not None:
+                return {
+                    "url": url,
+                    "content": content,
+                    "mode": "http",
+                    "latency": time.perf_counter() - start_time,
+                    "fallback_reason": None,
+                    "validators": validators,
+                }
+            if self.fetch_mode == "http":
+                raise ValueError(f"Page '{url}' can't be fetched without browser: {fallback_reason}")
+        report = self.__render_page(url)
+        report["fallback_reason"] = fallback_reason
+        report["latency"] = time.perf_counter() - start_time
+        report["validators"] = validators
+        return report
+
+    def __render_page(self, url):
+        """
+        Render the page in the browser.
+
+        Page is considered loaded when there is no network activity for `quiet_window` seconds (but no longer than
+        `max_wait`).
+
+        :param url: (str) URL of the page.
+        :return: (dict) Report with 'url', 'content', 'mode' and network wait ('network_source' is 'fixed_delay' when
+                 network activity can't be observed).
+        """
+        with self.pool.session() as driver:
+            read_network_events(driver)
+            driver.get(url)
 
-        content = self.driver.page_source
-        self.driver.close()
-        self.driver.quit()
+            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+            network = wait_for_network_idle(driver, self.quiet_window, self.max_wait)
 
-        return content
+            content = driver.page_source
+        return {
+            "url": url,
+            "content": content,
+            "mode": "browser",
+            "network_wait": network["waited"],
+            "network_idle": network["idle"],
+            "requests": network["requests"],
+            "network_source": network["source"],
+        }
 
     @staticmethod
     def extract_body_content(html_content):
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Filename: webdriver_pool.py
+Author: Iliya Vereshchagin
+Copyright (c) 2023. All rights reserved.
+
+Created: 18.10.2026
+Last Modified: 18.10.2026
+
+Description:
+This file contains bounded pool of warm headless Chrome sessions.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service as ChromeService
+
+from .chromedriver_cache import record_launch, resolve_chromedriver
+from .network_idle import enable_network_events, install_request_tracker
+
+
+def create_chrome_driver(headless=True):
+    """
+    Launch new Chrome session with network events in performance log (and counter of pending requests as fallback).
+
+    Startup timings (driver resolution and browser launch) are kept in `startup_timings` attribute of the driver.
+
+    :param headless: (bool) Run Chrome in headless mode.
+    :return: (webdriver.Chrome) The driver.
+    """
+    options = Options()
+    if headless:
+        options.add_argument("--headless")
+    enable_network_events(options)
+    start_time = time.perf_counter()
+    path = resolve_chromedriver()
+    resolved_time = time.perf_counter()
+    driver = webdriver.Chrome(service=ChromeService(executable_path=path), options=options)
+    driver.startup_timings = record_launch(resolved_time - start_time, time.perf_counter() - resolved_time)
+    install_request_tracker(driver)
+    return driver
+
+
+class PooledDriver:
+    """Chrome session of the pool with its usage counters."""
+
+    def __init__(self, driver):
+        """
+        General init.
+
+        :param driver: (webdriver.Chrome) The driver.
+        """
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.monotonic()
+        self.startup_timings = getattr(driver, "startup_timings", None)
+
+    def is_alive(self):
+        """
+        Health check: the browser responds to a trivial script.
+
+        :return: (bool) True if the session is usable.
+        """
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception:  # pylint: disable=broad-except
+            return False
+
+    def reset(self):
+        """
+        Reset the session state: clear cookies, local/session storage and navigate to about:blank.
+
+        :return: (bool) True if the session was reset successfully.
+        """
+        try:
+            self.driver.delete_all_cookies()
+            self.driver.execute_script(
+                "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (error) {}"
+            )
+            self.driver.get("about:blank")
+            return True
+        except Exception:  # pylint: disable=broad-except
+            return False
+
+    def quit(self):
+        """Quit the browser, ignoring errors of already dead sessions."""
+        try:
+            self.driver.quit()
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+
+class WebDriverPool:
+    """
+    The WebDriverPool class keeps up to `size` warm Chrome sessions.
+
+    Sessions are launched lazily, checked for health on checkout, reset on checkin and recycled after `max_pages`
+    pages to limit memory growth of long-lived browsers.
+    """
+
+    def __init__(self, size=2, max_pages=50, factory=None, checkout_timeout=60.0):
+        """
+        General init.
+
+        :param size: (int) Max count of sessions.
+        :param max_pages: (int) Count of pages after which the session is recycled.
+        :param factory: (callable) Function launching new driver, `create_chrome_driver` by default.
+        :param checkout_timeout: (float) Max time to wait for free session, in seconds.
+        """
+        self.size = size
+        self.max_pages = max_pages
+        self.factory = factory or create_chrome_driver
+        self.checkout_timeout = checkout_timeout
+        self.stats = {"launched": 0, "recycled": 0, "unhealthy": 0, "checkouts": 0}
+        self.___idle = []
+        self.___active = 0
+        self.___closed = False
+        self.___condition = threading.Condition()
+
+    def checkout(self):
+        """
+        Get healthy session from the pool, launching new one if there is no idle session and the pool isn't full.
+
+        :return: (PooledDriver) The session.
+        :raises TimeoutError: If no session is available within `checkout_timeout`.
+        """
+        deadline = time.monotonic() + self.checkout_timeout
+        with self.___condition:
+            while True:
+                if self.___closed:
+                    raise RuntimeError("WebDriverPool is closed")
+                if self.___idle:
+                    session = self.___idle.pop()
+                    break
+                if self.___active < self.size:
+                    session = None
+                    self.___active += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.___condition.wait(remaining):
+                    raise TimeoutError(f"No free browser session within {self.checkout_timeout} seconds")
+            self.stats["checkouts"] += 1
+        if session is not None and not session.is_alive():
+            self.__count("unhealthy")
+            session.quit()
+            session = None
+        if session is None:
+            try:
+                session = PooledDriver(self.factory())
+            except Exception:
+                self.__release_slot()
+                raise
+            self.__count("launched")
+        return session
+
+    def __count(self, name):
+        """
+        Increment counter of the pool stats.
+
+        :param name: (str) Name of the counter.
+        """
+        with self.___condition:
+            self.stats[name] += 1
+
+    def __release_slot(self):
+        """Release slot of discarded session and wake up waiting checkouts."""
+        with self.___condition:
+            self.___active -= 1
+            self.___condition.notify()
+
+    def checkin(self, session):
+        """
+        Return session to the pool: reset it or quit it when it's recycled or broken.
+
+        :param session: (PooledDriver) The session.
+        """
+        session.pages += 1
+        if self.___closed or session.pages >= self.max_pages or not session.reset():
+            self.__count("recycled")
+            session.quit()
+            self.__release_slot()
+            return
+        with self.___condition:
+            self.___idle.append(session)
+            self.___condition.notify()
+
+    @contextmanager
+    def session(self):
+        """
+        Context manager checking session out of the pool and back.
+
+        :return: (webdriver.Chrome) The driver.
+        """
+        session = self.checkout()
+        try:
+            yield session.driver
+        finally:
+            self.checkin(session)
+
+    def close(self):
+        """Quit idle sessions; sessions in use are quit on checkin."""
+        with self.___condition:
+            self.___closed = True
+            idle, self.___idle = self.___idle, []
+            self.___active -= len(idle)
+            self.___condition.notify_all()
+        for session in idle:
+            session.quit()
+
+    def __enter__(self):
+        """
+        Enter the context.
+
+        :return: (WebDriverPool) The pool.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Exit the context, closing the pool.
+
+        :param exc_type: The exception type.
+        :param exc_value: The exception.
+        :param traceback: The traceback.
+        """
+        self.close()